@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Stock aging for the Aged Stock page and the PDF report.
+
+An AgingEngine is built once per data snapshot: undelivered items are kept
+sorted by DATE so "older than N days" is a binary search, and a
+category x age-bucket histogram is precomputed for the summaries.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+AGED_DAYS = 10
+AGE_BUCKETS = [10, 30, 60, 90, 180]  # upper edges (days) of each bucket but the last
+
+
+def bucket_labels(edges):
+    labels = [f"0-{edges[0]}"]
+    labels += [f"{lo + 1}-{hi}" for lo, hi in zip(edges[:-1], edges[1:])]
+    labels.append(f"{edges[-1] + 1}+")
+    return labels
+
+
+class AgingEngine:
+    def __init__(self, df, buckets=AGE_BUCKETS, now=None):
+        now = pd.Timestamp(now or datetime.datetime.now())
+        self.frame = df
+        self.buckets = list(buckets)
+
+        # Positions (into df) of undelivered, dated items, oldest first
+        keep = ~df['DELIVERED'].astype(str).str.lower().eq('out') & df['DATE'].notna()
+        positions = np.flatnonzero(keep.to_numpy())
+        dates = df['DATE'].to_numpy()[positions]
+        order = np.argsort(dates, kind='stable')
+        self.rows = positions[order]
+        self.dates = dates[order]
+        self.items = df.iloc[self.rows]
+
+        ages = (now - self.items['DATE']).dt.days.to_numpy()
+        labels = bucket_labels(self.buckets)
+        bucket = pd.Categorical.from_codes(np.searchsorted(self.buckets, ages, side='left'), categories=labels)
+        self.histogram = pd.crosstab(self.items['CATEGORY'].to_numpy(), bucket, dropna=False)
+        self.histogram = self.histogram.reindex(columns=labels, fill_value=0)
+        self.histogram.index.name = 'CATEGORY'
+        self.histogram.columns.name = 'AGE'
+
+    def _count_older_than(self, days, now=None):
+        # AGE = (now - DATE).days > days  <=>  DATE <= now - (days + 1) days
+        now = pd.Timestamp(now or datetime.datetime.now())
+        cutoff = (now - pd.Timedelta(days=days + 1)).to_datetime64()
+        return int(np.searchsorted(self.dates, cutoff, side='right'))
+
+    def rows_older_than(self, days, now=None):
+        """Positions, in the frame the engine was built from, of items older than `days`."""
+        return self.rows[:self._count_older_than(days, now)]
+
+    def older_than(self, days, now=None):
+        """Items older than `days` days (oldest first) with an AGE column."""
+        now = pd.Timestamp(now or datetime.datetime.now())
+        aged = self.items.iloc[:self._count_older_than(days, now)].copy()
+        aged['AGE'] = (now - aged['DATE']).dt.days
+        return aged
+
+    def category_counts(self, days=AGED_DAYS):
+        """Aged item count per CATEGORY, read from the histogram when `days` is a bucket edge."""
+        if days in self.buckets:
+            counts = self.histogram.iloc[:, self.buckets.index(days) + 1:].sum(axis=1)
+        else:
+            counts = self.older_than(days).groupby('CATEGORY', observed=True).size()
+        counts = counts[counts > 0]
+        counts.index.name = 'CATEGORY'
+        return counts.reset_index(name='Count')
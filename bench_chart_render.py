@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Soak test of the cached chart rendering.
+
+Simulates reruns of the Monthly Sale page (six seaborn charts per rerun) and
+prints peak RSS every 100 reruns, once with chart_render and once the old
+way (plt.subplots + st.pyplot-style savefig, figures never closed). Each mode
+runs in a fresh process so the peak RSS is its own. Every tenth rerun the
+data changes, as with a new upload. The old way leaks gigabytes within a few
+hundred reruns, so it gets fewer of them. Run with:
+python bench_chart_render.py [reruns] [pyplot_reruns]
+"""
+
+import io
+import resource
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def synthetic_sales(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'parName': rng.choice([f"PARTY {i}" for i in range(200)], rows),
+        'CatCd': rng.choice([f"CAT{i}" for i in range(40)], rows),
+        'weight': rng.gamma(2.0, 8.0, rows).round(2),
+    })
+
+
+def page_charts(df):
+    """The (data, seaborn kwargs, title) of the Monthly Sale bar charts."""
+    parties = df.groupby('parName')['weight'].sum().reset_index().sort_values(by='weight', ascending=False)
+    categories = df.groupby('CatCd')['weight'].sum().reset_index().sort_values(by='weight', ascending=False)
+    return [
+        (parties.head(10), dict(x='weight', y='parName', palette='Blues_r'), 'Top 10 Parties by Weight'),
+        (parties.tail(5), dict(x='weight', y='parName', palette='Reds_r'), 'Bottom 5 Parties by Weight'),
+        (categories.head(10), dict(x='weight', y='CatCd', palette='pastel'), 'Top 10 Categories by Weight'),
+        (categories.tail(5), dict(x='weight', y='CatCd', palette='Oranges_r'), 'Bottom 5 Categories by Weight'),
+        (parties.head(20), dict(x='weight', y='parName'), 'Top 20 Parties by Weight'),
+        (categories.head(20), dict(x='weight', y='CatCd'), 'Top 20 Categories by Weight'),
+    ]
+
+
+def rerun_cached(charts):
+    from chart_render import chart_png
+    return sum(len(chart_png('barplot', data, title=title, **kw)) for data, kw, title in charts)
+
+
+def rerun_pyplot(charts):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    size = 0
+    for data, kw, title in charts:
+        fig, ax = plt.subplots()
+        sns.barplot(data=data, ax=ax, **kw)
+        ax.set_title(title)
+        out = io.BytesIO()
+        fig.savefig(out, format='png', dpi=200, bbox_inches='tight')
+        size += len(out.getvalue())
+    return size
+
+
+def run_one(reruns, mode):
+    import matplotlib
+    matplotlib.use('Agg')
+    rerun = rerun_cached if mode == 'cached' else rerun_pyplot
+    uploads = [synthetic_sales(seed=seed) for seed in range(reruns // 10 + 1)]
+    start = time.perf_counter()
+    for i in range(reruns):
+        rerun(page_charts(uploads[i // 10]))
+        if (i + 1) % 100 == 0:
+            print(f"{mode:<7} rerun {i + 1:>5}  {time.perf_counter() - start:7.1f} s  peak RSS {peak_rss_mib():7.1f} MiB",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--one":
+        run_one(int(sys.argv[2]), sys.argv[3])
+    else:
+        reruns = {"cached": 1000, "pyplot": 100}
+        for mode, arg in zip(reruns, sys.argv[1:]):
+            reruns[mode] = int(arg)
+        for mode, n in reruns.items():
+            subprocess.run([sys.executable, __file__, "--one", str(n), mode], check=True)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the Export Data formats.
+
+Exports a synthetic inventory as CSV, Parquet and Feather and prints the file
+size, write time and the time to load it back into pandas. Run with:
+python bench_data_export.py [rows ...]
+"""
+
+import io
+import sys
+import time
+
+import pandas as pd
+
+from bench_pdf_report import synthetic_inventory
+from compact_inventory import combine_sources
+from data_export import EXPORT_FORMATS, write_export
+
+READERS = {"CSV": pd.read_csv, "Parquet": pd.read_parquet, "Feather": pd.read_feather}
+
+
+def run(rows):
+    df, _ = combine_sources({"Sales": synthetic_inventory(rows)})
+    for fmt in EXPORT_FORMATS:
+        out = io.BytesIO()
+        start = time.perf_counter()
+        write_export(df, fmt, out)
+        written = time.perf_counter() - start
+        out.seek(0)
+        start = time.perf_counter()
+        READERS[fmt](out)
+        loaded = time.perf_counter() - start
+        print(f"{rows:>8} rows  {fmt:<8} {len(out.getvalue()) / 2**20:8.2f} MiB  "
+              f"write {written:7.3f} s  reload {loaded:7.3f} s")
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]:
+        run(n)
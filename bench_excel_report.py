@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the constant-memory Excel stock report.
+
+Writes the workbook for synthetic inventories and prints rows/sec and peak
+RSS, with xlsxwriter's constant_memory mode on and off. Each run happens in a
+fresh process so the peak RSS is its own. Run with:
+python bench_excel_report.py [rows ...]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_pdf_report import synthetic_inventory
+from compact_inventory import combine_sources
+from excel_report import write_inventory_workbook
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def run_one(rows, constant_memory):
+    df = synthetic_inventory(rows).drop(columns='CATEGORY')
+    df['PCS'] = np.random.default_rng(1).integers(1, 10, rows)
+    df['Category'] = df['DESIGN NO'].str.split('-').str[0]
+    half = rows // 2
+    overall, sources = combine_sources({"Salesperson": df.iloc[:half], "Factory": df.iloc[half:]})
+    aged = overall[pd.Timestamp.today() - overall['DATE'] > pd.Timedelta(days=30)]
+    before = peak_rss_mib()
+
+    start = time.perf_counter()
+    with open(os.devnull, 'wb') as out:
+        written = write_inventory_workbook(out, sources["Salesperson"], sources["Factory"], overall, aged,
+                                           constant_memory=constant_memory)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mib()
+    mode = "constant_memory" if constant_memory else "default"
+    print(f"{rows:>8} rows  {mode:<15}  {written:>8} rows written  {elapsed:8.2f} s  "
+          f"{written / elapsed:9.0f} rows/s  peak RSS {peak:7.1f} MiB (+{peak - before:.1f} MiB for the workbook)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--one":
+        run_one(int(sys.argv[2]), sys.argv[3] == "1")
+    else:
+        for n in [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 300_000]:
+            for constant_memory in ("1", "0"):
+                subprocess.run([sys.executable, __file__, "--one", str(n), constant_memory], check=True)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the export dashboard aggregation cube.
+
+Times the section summaries of export.py computed from the raw rows against
+building the ExportCube once and rolling it up (first and repeated visits),
+and checks both give the same numbers. Run with:
+python bench_export_cube.py [rows ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from export_cube import ExportCube
+
+SECTIONS = {
+    # name: (keys, measures)
+    "Party Ranking": ('PARTY', ['WEIGHT']),
+    "Party-Based": ('PARTY', ['WEIGHT']),
+    "Design-Based": ('DESIGN NO', ['WEIGHT']),
+    "Time-Based": ('DATE', ['WEIGHT', 'QTY']),
+    "Type-Based": ('TYPE', ['WEIGHT', 'QTY']),
+    "Size-Based": ('SIZE', ['WEIGHT']),
+}
+
+
+def synthetic_export(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'DATE': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 730, rows), unit='D'),
+        'PARTY': pd.array(rng.choice([f"PARTY {i}" for i in range(300)], rows), dtype='str'),
+        'TYPE': pd.array(rng.choice(['CHAIN', 'BANGLE', 'RING', 'PENDANT'], rows), dtype='str'),
+        'SIZE': pd.array(rng.choice(['16', '18', '20', '22', '24'], rows), dtype='str'),
+        'DESIGN NO': pd.array([f"D-{n}" for n in rng.integers(1, 5000, rows)], dtype='str'),
+        'WEIGHT': rng.gamma(2.0, 8.0, rows).round(2),
+        'QTY': rng.integers(1, 20, rows),
+    })
+
+
+def raw_summary(df, key, measures):
+    return df.groupby(key)[measures].sum().reset_index()
+
+
+def run(rows):
+    df = synthetic_export(rows)
+
+    start = time.perf_counter()
+    raw = {name: raw_summary(df, key, measures) for name, (key, measures) in SECTIONS.items()}
+    raw_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cube = ExportCube(df)
+    build_time = time.perf_counter() - start
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        rolled = {name: cube.rollup(key)[[key] + measures] for name, (key, measures) in SECTIONS.items()}
+        timings.append(time.perf_counter() - start)
+
+    for name in SECTIONS:
+        pd.testing.assert_frame_equal(rolled[name], raw[name], check_dtype=False)
+    print(f"{rows:>9} rows  {len(cube):>9} cells  raw sections {raw_time * 1000:8.1f} ms  "
+          f"cube build {build_time * 1000:8.1f} ms  first rollups {timings[0] * 1000:7.1f} ms  "
+          f"repeat {timings[1] * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000, 3_000_000]:
+        run(n)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the streaming PDF stock report.
+
+Renders the report for synthetic inventories and prints pages/sec, rows/sec
+and peak traced memory. Run with:  python bench_pdf_report.py [rows ...]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from aging_engine import AgingEngine
+from category_engine import CATEGORIES, classify_designs
+from pdf_report import write_inventory_report
+
+
+def synthetic_inventory(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'DATE': pd.Timestamp.today().normalize() - pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'DESIGN NO': [f"{c}-{n}" for c, n in zip(rng.choice(CATEGORIES, rows), rng.integers(1, 99999, rows))],
+        'WT': rng.gamma(2.0, 8.0, rows).round(2),
+        'DELIVERED': rng.choice(['', 'out'], rows, p=[0.9, 0.1]),
+    })
+    df['CATEGORY'] = classify_designs(df['DESIGN NO'])
+    return df
+
+
+def run(rows):
+    inventory = synthetic_inventory(rows)
+    half = rows // 2
+    sales_df, factory_df = inventory.iloc[:half], inventory.iloc[half:]
+    aging = AgingEngine(inventory)
+
+    start = time.perf_counter()
+    with open(os.devnull, 'wb') as out:
+        pages = write_inventory_report(out, sales_df, factory_df, aging)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass for memory, tracemalloc slows rendering down a lot
+    tracemalloc.start()
+    with open(os.devnull, 'wb') as out:
+        write_inventory_report(out, sales_df, factory_df, aging)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{rows:>8} rows  {pages:>6} pages  {elapsed:8.3f} s  "
+          f"{pages / elapsed:10.1f} pages/s  {rows / elapsed:10.0f} rows/s  peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]:
+        run(n)
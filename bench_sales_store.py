@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the month-partitioned sales store.
+
+Writes two years of synthetic monthly ERP exports as .xlsx, then compares
+parsing them one after another with pd.read_excel against SalesStore.ingest
+(parallel, projected). It also checks that an overlapping export adds no rows
+and times loading a 12-month range. Run with:
+python bench_sales_store.py [rows_per_month] [months]
+"""
+
+import io
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from sales_store import SalesStore
+
+
+def synthetic_month(month, rows, seed):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(month)
+    days = start.days_in_month
+    return pd.DataFrame({
+        'DocDate': start + pd.to_timedelta(rng.integers(0, days, rows), unit='D'),
+        'DocNo': rng.integers(1, 10 ** 6, rows),
+        'type': rng.choice(['SALE', 'RETURN'], rows, p=[0.95, 0.05]),
+        'parName': rng.choice([f"PARTY {i}" for i in range(300)], rows),
+        'CATEGORY': rng.choice(['CHAIN', 'BANGLE', 'RING', 'ST', 'Fine'], rows),
+        'CatCd': rng.choice([f"CAT{i}" for i in range(40)], rows),
+        'weight': rng.gamma(2.0, 8.0, rows).round(3),
+        'noPcs': rng.integers(1, 20, rows),
+        'Remarks': rng.choice(['', 'urgent', 'repeat order'], rows),
+    })
+
+
+def xlsx_bytes(df):
+    out = io.BytesIO()
+    df.to_excel(out, index=False, engine='xlsxwriter')
+    return out.getvalue()
+
+
+def run(rows, n_months):
+    months = pd.period_range('2023-01', periods=n_months, freq='M')
+    frames = [synthetic_month(str(m), rows, seed) for seed, m in enumerate(months)]
+    files = [(f"sales_{m}.xlsx", xlsx_bytes(df)) for m, df in zip(months, frames)]
+    # an export overlapping the last two months, as when a range is exported twice
+    overlap = pd.concat([frames[-2].iloc[rows // 2:], frames[-1].iloc[:rows // 2]], ignore_index=True)
+
+    start = time.perf_counter()
+    for _, content in files:
+        pd.read_excel(io.BytesIO(content))
+    sequential = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        store = SalesStore("monthly", root=root)
+        start = time.perf_counter()
+        report = store.ingest(files)
+        ingested = time.perf_counter() - start
+        added = sum(report.values())
+        again = store.ingest([("overlap.xlsx", xlsx_bytes(overlap))])
+
+        start = time.perf_counter()
+        year = store.load(str(months[-12].start_time.date()), str(months[-1].end_time.date()))
+        loaded = time.perf_counter() - start
+
+    print(f"{n_months} files x {rows} rows: read_excel one by one {sequential:6.1f} s, "
+          f"parallel ingest {ingested:6.1f} s ({added} rows stored); "
+          f"overlapping export added {again['overlap.xlsx']} rows; "
+          f"12-month load {loaded * 1000:6.1f} ms ({len(year)} rows)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(args[0] if args else 20_000, args[1] if len(args) > 1 else 24)
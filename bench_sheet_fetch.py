@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of cold sheet loading against a local HTTP stand-in for Google Sheets.
+
+Serves synthetic sheet CSVs from a local server (with an artificial response
+delay) at the same /export?format=csv&gid= path, then compares loading them one
+after the other with pd.read_csv(url) against the concurrent `sync_sheets` path
+over the pooled session. Run with:  python bench_sheet_fetch.py [rows [sheets [delay]]]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from bench_pdf_report import synthetic_inventory
+from inventory_snapshot import sync_sheets
+from sheet_fetcher import get_session, sheet_url
+
+
+def serve_sheets(sheets, delay=0.0):
+    """Serve {gid: csv bytes} on a local port; returns (server, base URL)."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            gid = parse_qs(urlparse(self.path).query).get("gid", [""])[0]
+            body = sheets.get(gid)
+            time.sleep(delay)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/export?format=csv&gid="
+
+
+def run(rows, n_sheets=2, delay=0.3):
+    sheets = {str(gid): synthetic_inventory(rows, seed=gid).drop(columns='CATEGORY').to_csv(index=False).encode()
+              for gid in range(n_sheets)}
+    server, base_url = serve_sheets(sheets, delay)
+    urls = {f"sheet{gid}": sheet_url(gid, base_url) for gid in sheets}
+    get_session()  # the apps import requests anyway; keep that out of the timing
+    try:
+        start = time.perf_counter()
+        for url in urls.values():
+            pd.read_csv(url)
+        sequential = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            sync_sheets(urls, cache_dir=cache_dir, max_age=0)
+            concurrent = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    print(f"{rows:>8} rows x {n_sheets} sheets  delay {delay:.2f} s  "
+          f"sequential read_csv {sequential:7.3f} s  concurrent sync {concurrent:7.3f} s  "
+          f"speed-up {sequential / concurrent:5.2f}x")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args:
+        run(int(args[0]), int(args[1]) if len(args) > 1 else 2, float(args[2]) if len(args) > 2 else 0.3)
+    else:
+        for n, sheets in [(1_000, 2), (50_000, 2), (50_000, 6)]:
+            run(n, sheets)
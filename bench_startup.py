@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Cold-start benchmark of the Streamlit apps.
+
+Each app is measured in fresh processes: the time to run its module-level
+imports (after Streamlit and pandas, which every app needs) and which heavy
+libraries they pull in, then the time to the first render of its default
+page with AppTest, as a new container would serve the first page view. The
+inventory apps read synthetic sheets from a local stand-in for Google Sheets
+that answers after `delay` seconds; snapshot and upload caches start empty.
+Run with:  python bench_startup.py [rows [delay]]
+"""
+
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+APPS = ("inventory_mangement.py", "untitled14.py", "sales.py", "monthly_sales.py", "export.py", "loan.py",
+        "order.py", "orders_application.py", "label.py", "codeextraction.py")
+HEAVY = ("matplotlib", "seaborn", "plotly", "sklearn", "scipy", "cv2", "requests", "openpyxl", "xlsxwriter",
+         "PIL", "fpdf", "PyPDF2", "barcode")
+SHEET_GIDS = ("2076018430", "0")
+
+
+def heavy_loaded(before=()):
+    return [name for name in HEAVY if name in sys.modules and name not in before]
+
+
+def module_imports(path):
+    """Code of the top-level import statements of the script at `path`."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return compile(ast.Module(body=body, type_ignores=[]), path, 'exec')
+
+
+def run_one(mode, app):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    result = {}
+    start = time.perf_counter()
+    if mode == "imports":
+        import pandas  # noqa: F401
+        import streamlit  # noqa: F401
+        result['baseline_ms'] = (time.perf_counter() - start) * 1000
+        before = heavy_loaded()
+        start = time.perf_counter()
+        try:
+            exec(module_imports(app), {'__name__': '__bench__'})
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['imports_ms'] = (time.perf_counter() - start) * 1000
+    else:
+        from streamlit.testing.v1 import AppTest
+
+        before = heavy_loaded()
+        start = time.perf_counter()
+        at = AppTest.from_file(app, default_timeout=300).run()
+        result['render_ms'] = (time.perf_counter() - start) * 1000
+        if at.exception:
+            result['error'] = at.exception[0].message.splitlines()[0]
+    result['heavy'] = heavy_loaded(before)
+    print(json.dumps(result))
+
+
+def measure(mode, app, env):
+    out = subprocess.run([sys.executable, __file__, "--one", mode, app], env=env, capture_output=True, text=True)
+    lines = out.stdout.strip().splitlines()
+    if out.returncode or not lines:
+        return {'error': (out.stderr.strip().splitlines() or ['failed'])[-1]}
+    return json.loads(lines[-1])
+
+
+def run(rows, delay):
+    from bench_pdf_report import synthetic_inventory
+    from bench_sheet_fetch import serve_sheets
+
+    sheets = {gid: synthetic_inventory(rows, seed=n).drop(columns='CATEGORY').to_csv(index=False).encode()
+              for n, gid in enumerate(SHEET_GIDS)}
+    server, base_url = serve_sheets(sheets, delay)
+    print(f"sheets: {rows} rows each, served after {delay:.2f} s")
+    print(f"{'app':<24} {'st + pd':>8} {'imports':>9} {'first render':>13}  heavy modules imported")
+    try:
+        for app in APPS:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                env = dict(os.environ, SHEETS_BASE_URL=base_url,
+                           INVENTORY_SNAPSHOT_DIR=os.path.join(cache_dir, "snapshots"),
+                           UPLOAD_CACHE_DIR=os.path.join(cache_dir, "uploads"),
+                           SALES_STORE_DIR=os.path.join(cache_dir, "store"))
+                imports = measure("imports", app, env)
+                render = measure("render", app, env)
+            error = imports.get('error') or render.get('error')
+            print(f"{app:<24} {imports.get('baseline_ms', 0):6.0f}ms {imports.get('imports_ms', 0):7.0f}ms "
+                  f"{render.get('render_ms', 0):11.0f}ms  {', '.join(render.get('heavy', [])) or '-'}"
+                  + (f"  [{error}]" if error else ""), flush=True)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--one":
+        run_one(sys.argv[2], sys.argv[3])
+    else:
+        args = sys.argv[1:]
+        run(int(args[0]) if args else 50_000, float(args[1]) if len(args) > 1 else 0.5)
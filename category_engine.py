@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Design-number category classification for the inventory sheets.
+
+The whole DESIGN NO column is classified in one pass with a compiled pattern
+that tries longer codes first ("SPE" before "SP"), and the result for every
+design number is memoized so reruns only classify design numbers not seen yet.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ["CM", "CL", "CN", "CZ", "EX", "FR", "FS", "GL", "GT", "OP", "PL", "LN", "LO", "MD", "MV", "NA", "SP", "SPE", "UN"]
+OTHER = "Other"
+LABELS = CATEGORIES + [OTHER]
+
+# Longest codes first so the leftmost match is also the longest one
+CATEGORY_PATTERN = re.compile("(" + "|".join(
+    re.escape(c) for c in sorted(CATEGORIES, key=len, reverse=True)) + ")")
+
+_LABEL_CODES = {label: i for i, label in enumerate(LABELS)}
+_memo = {}
+MEMO_LIMIT = 200_000
+
+
+def extract_category(design_no):
+    """Category code for a single design number ("Other" if none matches)."""
+    match = CATEGORY_PATTERN.search(str(design_no))
+    return match.group(1) if match else OTHER
+
+
+def classify_designs(design_nos):
+    """Classify a DESIGN NO column; returns a pandas Categorical of LABELS.
+
+    Missing design numbers are OTHER, like str(nan) is.
+    """
+    values = pd.Series(design_nos).astype(str)
+    codes, uniques = pd.factorize(values)
+
+    # Labels for this call are gathered locally: other sessions (and the
+    # report thread) may clear the shared memo at any time
+    labels = {}
+    missing = []
+    for u in uniques:
+        label = _memo.get(u)
+        if label is None:
+            missing.append(u)
+        else:
+            labels[u] = label
+    if missing:
+        found = pd.Series(missing, dtype=object).str.extract(CATEGORY_PATTERN, expand=False).fillna(OTHER)
+        labels.update(zip(missing, found))
+        if len(_memo) + len(missing) > MEMO_LIMIT:
+            _memo.clear()
+            _memo.update(labels)
+        else:
+            _memo.update(zip(missing, found))
+
+    unique_codes = np.array([_LABEL_CODES[labels[u]] for u in uniques] + [_LABEL_CODES[OTHER]], dtype=np.int8)
+    # factorize gives missing values code -1: the appended OTHER
+    return pd.Categorical.from_codes(unique_codes[codes], categories=LABELS)
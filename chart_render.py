@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Cached PNG rendering of the seaborn charts on the sales dashboards.
+
+Charts are drawn on standalone matplotlib Figures (never registered with
+pyplot, so nothing accumulates between reruns), saved as PNG and released.
+The bytes are kept in a process-wide LRU keyed by a fingerprint of the data
+plus the chart spec, so a rerun or another session showing the same chart
+gets the cached image instead of a new render. The cache is bounded by entry
+count and by total bytes. matplotlib and seaborn are imported by the first
+render, not with this module.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DPI = 200  # what st.pyplot uses
+MAX_CACHED_CHARTS = 128
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_render_lock = threading.Lock()  # matplotlib and seaborn are not thread-safe
+_theme = None  # sns.set_theme arguments, applied before the next render
+
+
+def frame_fingerprint(df):
+    """Hash of the values, columns and dtypes of `df` (index ignored)."""
+    digest = hashlib.sha1(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _cached(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _remember(key, png):
+    global _cache_bytes
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = png
+        _cache_bytes += len(png)
+        while _cache and (len(_cache) > MAX_CACHED_CHARTS or _cache_bytes > MAX_CACHE_BYTES):
+            _, old = _cache.popitem(last=False)
+            _cache_bytes -= len(old)
+
+
+def use_theme(**kwargs):
+    """Seaborn theme for the charts (sns.set_theme arguments), set when the next one is drawn."""
+    global _theme
+    _theme = kwargs
+
+
+def render_png(draw, figsize=(8, 6), dpi=DPI):
+    """PNG bytes of a figure drawn by `draw(ax)`; the figure is released afterwards."""
+    global _theme
+    from matplotlib.figure import Figure
+
+    if _theme is not None:
+        import seaborn as sns
+
+        sns.set_theme(**_theme)
+        _theme = None
+    fig = Figure(figsize=figsize)
+    try:
+        draw(fig.subplots())
+        out = io.BytesIO()
+        fig.savefig(out, format='png', dpi=dpi, bbox_inches='tight')
+        return out.getvalue()
+    finally:
+        fig.clear()
+
+
+def figure_png(key, draw, figsize=(6.4, 4.8)):
+    """PNG of the figure drawn by `draw(ax)`, cached under `key` plus `figsize`.
+
+    `key` must identify both the data and everything `draw` does with it.
+    """
+    cache_key = (key, figsize)
+    png = _cached(cache_key)
+    if png is not None:
+        return png
+    with _render_lock:
+        png = _cached(cache_key)
+        if png is None:
+            png = render_png(draw, figsize)
+            _remember(cache_key, png)
+    return png
+
+
+def chart_png(kind, data, key=None, figsize=(6.4, 4.8), title=None, title_kw=None, xtick_rotation=None, **kwargs):
+    """PNG of the seaborn plot `kind` (e.g. 'barplot') of `data`, from the cache when possible.
+
+    `key` identifies the data instead of hashing it (e.g. upload digest plus
+    chart name) - worth it for charts drawn from a whole upload. Keyword
+    arguments are passed to the seaborn function.
+    """
+    spec = (kind, title, repr(sorted((title_kw or {}).items())), xtick_rotation, repr(sorted(kwargs.items())))
+    cache_key = (key if key is not None else frame_fingerprint(data),) + spec
+
+    def draw(ax):
+        import seaborn as sns
+
+        getattr(sns, kind)(data=data, ax=ax, **kwargs)
+        if title is not None:
+            ax.set_title(title, **(title_kw or {}))
+        if xtick_rotation is not None:
+            ax.tick_params(axis='x', labelrotation=xtick_rotation)
+
+    return figure_png(cache_key, draw, figsize)
+
+
+def cache_info():
+    with _cache_lock:
+        return {'charts': len(_cache), 'bytes': _cache_bytes}
+
+
+def clear_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
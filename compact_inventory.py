@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Compact in-memory representation of the inventory sheets.
+
+Both inventory apps keep one combined frame with a SOURCE column instead of a
+frame per sheet plus pd.concat copies; per-source frames are contiguous
+slices of it. Low-cardinality columns become categoricals, other text columns
+Arrow-backed strings, and integer columns are downcast. Fractional floats
+(WT) stay float64 by default because they are summed for the totals.
+
+Run `python compact_inventory.py sales.csv factory.csv` for a memory report.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+SOURCE_COLUMN = 'SOURCE'  # which sheet a row came from; not part of the sheets' own columns
+CATEGORICAL_COLUMNS = [SOURCE_COLUMN, 'DELIVERED', 'CATEGORY', 'Category', 'DESIGN NO']
+STRING_DTYPE = "string[pyarrow]"
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_frame(df, categorical=CATEGORICAL_COLUMNS, float32=False):
+    """Return a copy of `df` using the compact dtypes."""
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            out[col] = series
+        elif col in categorical:
+            out[col] = series.astype('category')
+        elif _is_text(series):
+            out[col] = series.astype(STRING_DTYPE)
+        elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+            out[col] = series
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            out[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy()
+            if series.notna().all() and np.array_equal(values, np.round(values)):
+                out[col] = pd.to_numeric(series, downcast='integer')
+            elif float32:
+                out[col] = pd.to_numeric(series, downcast='float')
+            else:
+                out[col] = series
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def combine_sources(frames, **kwargs):
+    """One compact frame of all `frames` ({source name: frame}) with a SOURCE column.
+
+    Returns the combined frame and {source name: slice of it}; the slices
+    are contiguous row ranges, so they do not copy the data.
+    """
+    names = list(frames)
+    combined = pd.concat([frames[name] for name in names], ignore_index=True)
+    combined.insert(0, SOURCE_COLUMN, np.repeat(names, [len(frames[name]) for name in names]))
+    combined = compact_frame(combined, **kwargs)
+    combined[SOURCE_COLUMN] = combined[SOURCE_COLUMN].cat.set_categories(names)
+    slices, start = {}, 0
+    for name in names:
+        slices[name] = combined.iloc[start:start + len(frames[name])]
+        start += len(frames[name])
+    return combined, slices
+
+
+def memory_usage(frames):
+    """Deep memory use in bytes of a frame or the sum over a list of frames."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+
+
+def memory_report(frames):
+    """Before/after memory table for {source name: prepared frame}.
+
+    "Before" is the per-sheet frames plus the concat copy made for the
+    combined views; "after" is the single compact combined frame.
+    """
+    before = list(frames.values())
+    both = pd.concat(before, ignore_index=True)
+    combined, _ = combine_sources(frames)
+    rows = [(name, memory_usage(df), None) for name, df in frames.items()]
+    rows.append(("Combined (concat copy)", memory_usage(both), None))
+    rows.append(("Total", memory_usage(before) + memory_usage(both), memory_usage(combined)))
+    report = pd.DataFrame(rows, columns=['Frame', 'Before (MB)', 'After (MB)'])
+    report[['Before (MB)', 'After (MB)']] = report[['Before (MB)', 'After (MB)']] / 2 ** 20
+    report['Saving %'] = 100 * (1 - report['After (MB)'] / report['Before (MB)'])
+    return report
+
+
+if __name__ == "__main__":
+    from category_engine import classify_designs
+
+    paths = sys.argv[1:] or []
+    if not paths:
+        sys.exit("usage: python compact_inventory.py SHEET.csv [SHEET.csv ...]")
+    frames = {}
+    for path in paths:
+        df = pd.read_csv(path)
+        df['DATE'] = pd.to_datetime(df['DATE'], errors='coerce')
+        df = df[~df['DELIVERED'].astype(str).str.lower().eq('out')].copy()
+        df['CATEGORY'] = classify_designs(df['DESIGN NO'])
+        frames[path] = df
+    with pd.option_context('display.float_format', '{:.2f}'.format):
+        print(memory_report(frames).to_string(index=False))
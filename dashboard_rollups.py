@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Dashboard rollups kept up to date from sheet snapshot deltas.
+
+A RollupStore holds, per source (e.g. "Sales", "Factory"), the WT total and
+WT sum / row count by CATEGORY and by DATE. When a new snapshot follows the one
+the store reflects, only its added and removed rows are applied; otherwise
+the source is rebuilt from the full frame.
+"""
+
+import threading
+
+import pandas as pd
+
+
+def _aggregate(df, key):
+    grouped = df.groupby(key, observed=True)['WT']
+    return pd.DataFrame({'WT': grouped.sum(), 'ROWS': grouped.size()})
+
+
+def _combine(current, delta, sign):
+    combined = current.add(sign * delta, fill_value=0)
+    return combined[combined['ROWS'] > 0]
+
+
+class RollupStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.digests = {}
+        self.totals = {}
+        self.by_category = {}
+        self.by_date = {}
+
+    def rebuild(self, source, df, digest=None):
+        self.totals[source] = float(df['WT'].sum())
+        self.by_category[source] = _aggregate(df, 'CATEGORY')
+        self.by_date[source] = _aggregate(df, 'DATE')
+        self.digests[source] = digest
+
+    def apply(self, source, added, removed, digest=None):
+        """Update `source` with rows that appeared (`added`) and disappeared (`removed`)."""
+        for rows, sign in ((added, 1), (removed, -1)):
+            if rows.empty:
+                continue
+            self.totals[source] += sign * float(rows['WT'].sum())
+            self.by_category[source] = _combine(self.by_category[source], _aggregate(rows, 'CATEGORY'), sign)
+            self.by_date[source] = _combine(self.by_date[source], _aggregate(rows, 'DATE'), sign)
+        self.digests[source] = digest
+
+    def sync(self, source, snapshot, frame, prepare):
+        """Bring `source` up to date with a SheetSnapshot.
+
+        `frame` is the prepared full frame (used for rebuilds) and `prepare`
+        turns raw sheet rows into prepared rows (used for deltas).
+        """
+        with self.lock:
+            if source in self.digests and self.digests[source] == snapshot.digest:
+                return
+            if source in self.digests and self.digests[source] == snapshot.previous:
+                self.apply(source, prepare(snapshot.added), prepare(snapshot.removed), snapshot.digest)
+            else:
+                self.rebuild(source, frame, snapshot.digest)
+
+    def total(self, source):
+        with self.lock:
+            return self.totals[source]
+
+    def category_totals(self, source):
+        with self.lock:
+            return self.by_category[source]['WT'].rename_axis('CATEGORY').reset_index()
+
+    def date_totals(self, source):
+        with self.lock:
+            return self.by_date[source]['WT'].sort_index().rename_axis('DATE').reset_index()
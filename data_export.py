@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Inventory exports as CSV, Parquet or Arrow Feather.
+
+Exports are projected to the chosen columns and filtered to a date range
+before serializing. CSV is written in row chunks rather than one big string,
+and Parquet / Feather keep the column types, so reloading them skips CSV
+parsing entirely.
+"""
+
+import tempfile
+
+import pandas as pd
+
+EXPORT_FORMATS = {
+    # name: (file extension, MIME type)
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Feather": ("feather", "application/vnd.apache.arrow.file"),
+}
+PARQUET_COMPRESSION = ["zstd", "snappy", "gzip", "none"]
+CSV_CHUNK_ROWS = 50_000
+
+
+def select_rows(df, columns=None, date_range=None, date_column='DATE'):
+    """`df` projected to `columns` and limited to dates within `date_range` (inclusive)."""
+    if date_range is not None and date_column in df.columns:
+        start, end = (pd.Timestamp(d) for d in date_range)
+        dates = df[date_column]
+        df = df[(dates >= start) & (dates < end + pd.Timedelta(days=1))]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def write_csv(df, out, chunk_rows=CSV_CHUNK_ROWS):
+    """Write `df` as UTF-8 CSV to the binary file `out`, `chunk_rows` rows at a time."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        out.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+
+
+def write_export(df, fmt, out, compression="zstd"):
+    """Serialize `df` in one of EXPORT_FORMATS to the binary file `out`."""
+    if fmt == "CSV":
+        write_csv(df, out)
+    elif fmt == "Parquet":
+        df.to_parquet(out, index=False, compression=None if compression == "none" else compression)
+    elif fmt == "Feather":
+        df.reset_index(drop=True).to_feather(out, compression="zstd")
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_file(df, fmt, compression="zstd"):
+    """The export as bytes (st.download_button does not accept file objects other than BytesIO)."""
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as out:
+        write_export(df, fmt, out, compression)
+        out.seek(0)
+        return out.read()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""DESIGN NO lookups for the inventory pages, built once per data snapshot.
+
+The normalized (stripped, lowercased) design numbers, as text the way the
+original `astype(str)` filter saw them, are kept sorted and unique, with the rows of each design stored contiguously, so a prefix lookup
+is two binary searches. Substring queries scan the unique designs (vectorized)
+instead of every row. Rows are also pre-partitioned by
+Category. Lookups return row positions, so callers never copy the frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from search_index import REGEX_CHARS
+
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class DesignIndex:
+    def __init__(self, df, column='DESIGN NO', partition='Category'):
+        self.df = df
+        self.column = column
+        designs = df[column] if column in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        # The text the original `astype(str).str.contains(query, case=False)` filter searched: a missing
+        # design is 'nan' on pandas < 3 and stays missing (never matched) on pandas 3. Stripping it cannot
+        # change a substring match, as queries are stripped too.
+        text = designs.astype(str)
+        valid = text.notna().to_numpy()
+        normalized = text[valid].str.strip().str.lower().to_numpy(dtype=object)
+        codes, uniques = pd.factorize(normalized, sort=True)
+
+        # Rows grouped by design (sheet order within a design); design i owns
+        # rows[starts[i]:starts[i + 1]]
+        order = np.argsort(codes, kind='stable')
+        self.rows = np.flatnonzero(valid)[order]
+        self.row_codes = codes[order]
+        self.starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+        self.designs = np.asarray(uniques, dtype=str)
+
+        if partition in df.columns:
+            labels = df[partition]
+            self.categories = list(labels.dropna().unique())
+            self.partitions = {k: np.asarray(v) for k, v in df.groupby(partition, observed=True, sort=False).indices.items()}
+            self.row_category = pd.Categorical(labels, categories=self.categories).codes
+        else:
+            self.categories, self.partitions, self.row_category = [], {}, None
+
+    def prefix_codes(self, query):
+        """Range of design codes starting with `query` (normalized)."""
+        lo = np.searchsorted(self.designs, query, side='left')
+        hi = np.searchsorted(self.designs, query + _MAX_CHAR, side='left')
+        return lo, hi
+
+    def contains_codes(self, query):
+        """Mask over the design codes containing `query` (normalized)."""
+        return np.char.find(self.designs, query) >= 0
+
+    def design_rows(self, query, prefix=False):
+        """Sorted row positions whose DESIGN NO starts with / contains `query`."""
+        query = query.strip().lower()
+        if prefix:
+            lo, hi = self.prefix_codes(query)
+            rows = self.rows[self.starts[lo]:self.starts[hi]]
+        else:
+            rows = self.rows[self.contains_codes(query)[self.row_codes]]
+        return np.sort(rows)
+
+    def select(self, query="", category=None, prefix=False):
+        """Row positions matching the design query within `category`.
+
+        Returns None when nothing is filtered (all rows). Queries with regex
+        characters use pandas `str.contains`, like the original filter.
+        """
+        query = query.strip() if self.column in self.df.columns else ""
+        partition = None
+        if category is not None:
+            partition = self.partitions.get(category, np.array([], dtype=np.intp))
+        if not query:
+            return partition
+
+        if prefix or not set(query) & REGEX_CHARS:
+            rows = self.design_rows(query, prefix)
+            if partition is not None:
+                code = self.categories.index(category) if category in self.categories else -2
+                rows = rows[self.row_category[rows] == code]
+            return rows
+
+        scope = self.df[self.column] if partition is None else self.df[self.column].iloc[partition]
+        found = scope.astype(str).str.contains(query, case=False, na=False).to_numpy()
+        return np.flatnonzero(found) if partition is None else partition[found]
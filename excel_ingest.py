@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Projected ingestion of the sales and export spreadsheets.
+
+Workbooks are streamed with openpyxl in read-only mode. The header row is
+located first (the first of the top rows holding every required column), so
+a file missing a column is rejected before its body is read. Only the span
+of the requested columns is kept from each row, explicit dtypes are applied
+to the result, and an optional callback reports progress.
+"""
+
+from io import BytesIO
+
+import pandas as pd
+
+from compact_inventory import STRING_DTYPE
+
+HEADER_SCAN_ROWS = 20
+PROGRESS_EVERY = 5_000
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__(f"Missing required columns: {self.missing}")
+
+    def __reduce__(self):
+        # keep .missing intact when raised in a pool worker
+        return type(self), (self.missing,)
+
+
+def _header_name(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def find_header(rows, required):
+    """(index, header) of the first row in `rows` containing all `required` names."""
+    best_missing = list(required)
+    for index, row in enumerate(rows):
+        header = [_header_name(v) for v in row]
+        present = set(h for h in header if h is not None)
+        if not present:
+            continue
+        missing = [col for col in required if col not in present]
+        if not missing:
+            return index, header
+        if len(missing) < len(best_missing):
+            best_missing = missing
+    raise MissingColumnsError(best_missing)
+
+
+def apply_dtypes(df, dtypes):
+    """Cast columns: 'datetime', 'string', or any numeric dtype (bad values become NaN)."""
+    for col, dtype in (dtypes or {}).items():
+        if col not in df.columns:
+            continue
+        if dtype == 'datetime':
+            df[col] = pd.to_datetime(df[col])
+        elif dtype == 'string':
+            df[col] = df[col].astype(STRING_DTYPE)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return df
+
+
+def _projected_rows(ws, min_row, wanted):
+    """Value tuples of the rows from `min_row` on, holding only the `wanted` columns.
+
+    `wanted` maps 1-based column numbers to their slot in the tuple. Only the
+    span from the first to the last wanted column is read (openpyxl's public
+    read-only iter_rows); columns before and after it are skipped.
+    """
+    order = sorted(wanted, key=wanted.get)
+    first = min(order)
+    offsets = [c - first for c in order]
+    for row in ws.iter_rows(min_row=min_row, min_col=first, max_col=max(order), values_only=True):
+        yield tuple(row[i] if i < len(row) else None for i in offsets)
+
+
+def read_excel_projected(source, columns=None, required=None, dtypes=None, sheet=None, progress=None, optional=()):
+    """Read one worksheet of an .xlsx file (path, bytes or file object).
+
+    `columns` limits the result to those columns (default: all), plus those
+    of `optional` the sheet has; `required` (default: `columns`) must all be
+    present in the header row, otherwise MissingColumnsError is raised
+    before the body is read. Empty rows are
+    dropped, like pd.read_excel does. `progress(rows_read, total_rows)` is
+    called every PROGRESS_EVERY rows; total_rows may be None.
+    """
+    from openpyxl import load_workbook
+
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    required = list(columns or []) if required is None else list(required)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = workbook[sheet] if sheet is not None else workbook.active
+        top = list(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+        header_index, header = find_header(top, required)
+        if columns is None:
+            columns = [h for h in header if h is not None]
+        else:
+            columns = list(columns) + [col for col in optional if col in header and col not in columns]
+        positions = {name: i for i, name in reversed(list(enumerate(header)))}
+        wanted = {positions[col] + 1: slot for slot, col in enumerate(columns)}
+
+        total = ws.max_row - header_index - 1 if ws.max_row else None
+        records = []
+        for n, row in enumerate(_projected_rows(ws, header_index + 2, wanted), 1):
+            if any(v is not None for v in row):
+                records.append(row)
+            if progress is not None and n % PROGRESS_EVERY == 0:
+                progress(n, total)
+    finally:
+        workbook.close()
+
+    if progress is not None:
+        progress(len(records), len(records))
+    df = pd.DataFrame.from_records(records, columns=list(columns))
+    return apply_dtypes(df, dtypes)
+
+
+def read_csv_projected(source, columns=None, dtypes=None, progress=None, optional=()):
+    """CSV counterpart of `read_excel_projected` (header validated before the body)."""
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    header = [_header_name(h) for h in pd.read_csv(source, nrows=0).columns]
+    missing = [col for col in (columns or []) if col not in header]
+    if missing:
+        raise MissingColumnsError(missing)
+    if columns is not None:
+        columns = list(columns) + [col for col in optional if col in header and col not in columns]
+    source.seek(0)
+    df = pd.read_csv(source, usecols=lambda h: columns is None or _header_name(h) in columns)
+    df.columns = [_header_name(h) for h in df.columns]
+    if columns is not None:
+        df = df[list(columns)]
+    if progress is not None:
+        progress(len(df), len(df))
+    return apply_dtypes(df, dtypes)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Excel stock report written with xlsxwriter in constant_memory mode.
+
+Rows are written strictly in order and each finished row is flushed to a
+temporary file, so memory use stays flat whatever the inventory size. Every
+column is converted in chunks (dates to Excel serial numbers, missing values
+dropped) and written with one fixed writer per column.
+"""
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+EXCEL_EPOCH = np.datetime64("1899-12-30")
+MAX_ROWS = 1_048_575  # data rows per worksheet (one row is the header)
+
+
+def _column(series):
+    """Python values of a column for the worksheet; missing values become None."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        values = series.dt.tz_localize(None) if getattr(series.dt, 'tz', None) else series
+        numbers = (values.to_numpy(dtype='datetime64[ns]') - EXCEL_EPOCH) / np.timedelta64(1, 'D')
+    elif pd.api.types.is_bool_dtype(series.dtype):
+        return [None if pd.isna(v) else bool(v) for v in series.astype(object).tolist()]
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        numbers = series.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        missing = series.isna().to_numpy()
+        values = series.astype(object).tolist()
+        for i in np.flatnonzero(missing):
+            values[i] = None
+        return [v if v is None or type(v) is str else str(v) for v in values]
+    values = numbers.tolist()
+    for i in np.flatnonzero(~np.isfinite(numbers)):
+        values[i] = None
+    return values
+
+
+def _writers(ws, df, formats):
+    """One (write method, format) per column of `df`."""
+    writers = []
+    for c, col in enumerate(df.columns):
+        dtype = df[col].dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            ws.set_column(c, c, 12)
+            writers.append((ws.write_number, formats['date']))
+            continue
+        ws.set_column(c, c, 14)
+        if pd.api.types.is_bool_dtype(dtype):
+            writers.append((ws.write_boolean, None))
+        elif pd.api.types.is_numeric_dtype(dtype):
+            writers.append((ws.write_number, None))
+        else:
+            writers.append((ws.write_string, None))
+    return writers
+
+
+def write_frame(workbook, name, df, formats, chunk=10_000):
+    """Write `df` (header + rows) to new worksheet(s); returns the data rows written.
+
+    Columns are converted `chunk` rows at a time, so only one chunk of Python
+    values is alive at once.
+    """
+    for part, start in enumerate(range(0, max(len(df), 1), MAX_ROWS)):
+        sheet_name = name if part == 0 else f"{name} ({part + 1})"
+        ws = workbook.add_worksheet(sheet_name[:31])
+        ws.freeze_panes(1, 0)
+        ws.write_row(0, 0, [str(col) for col in df.columns], formats['header'])
+        writers = _writers(ws, df, formats)
+        stop = min(start + MAX_ROWS, len(df))
+        for lo in range(start, stop, chunk):
+            block = df.iloc[lo:min(lo + chunk, stop)]
+            rows = zip(*[_column(block[col]) for col in block.columns])
+            for r, row in enumerate(rows, start=lo - start + 1):
+                for c, value in enumerate(row):
+                    if value is not None:
+                        write, fmt = writers[c]
+                        write(r, c, value, fmt)
+    return len(df)
+
+
+def category_summary(overall_df, aged_df=None, category='Category', source='SOURCE'):
+    """PCS / WT / item totals per category, by source and overall, plus aged item counts."""
+    df = overall_df.assign(Items=1)
+    values = [c for c in ('PCS', 'WT') if c in df.columns] + ['Items']
+    by_source = df.pivot_table(index=category, columns=source, values=values, aggfunc='sum',
+                               fill_value=0, observed=True)[values]
+    by_source.columns = [f"{src} {col}" for col, src in by_source.columns]
+    table = by_source.join(df.groupby(category, observed=True)[values].sum().add_prefix('Total '))
+    if aged_df is not None:
+        table['Aged Items'] = aged_df.groupby(category, observed=True).size().reindex(table.index, fill_value=0)
+    order_by = 'Total WT' if 'WT' in values else f"Total {values[0]}"
+    return table.sort_values(order_by, ascending=False).reset_index()
+
+
+def write_inventory_workbook(out, salesperson_df, factory_df, overall_df, aged_df, constant_memory=True):
+    """Write the Excel stock report to `out` (path or binary file object).
+
+    Sheets: Summary (category totals), Salesperson, Factory, Overall and
+    Aged Stock. Returns the number of inventory rows written.
+    """
+    workbook = xlsxwriter.Workbook(out, {'constant_memory': constant_memory, 'strings_to_numbers': False,
+                                         'strings_to_formulas': False, 'strings_to_urls': False})
+    formats = {'header': workbook.add_format({'bold': True, 'bg_color': '#DDEBF7', 'border': 1}),
+               'date': workbook.add_format({'num_format': 'yyyy-mm-dd'})}
+    rows = 0
+    try:
+        write_frame(workbook, "Summary", category_summary(overall_df, aged_df), formats)
+        rows += write_frame(workbook, "Salesperson", salesperson_df, formats)
+        rows += write_frame(workbook, "Factory", factory_df, formats)
+        rows += write_frame(workbook, "Overall", overall_df, formats)
+        rows += write_frame(workbook, "Aged Stock", aged_df, formats)
+    finally:
+        workbook.close()
+    return rows
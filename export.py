@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import streamlit as st
 import warnings
 import io
+from chart_render import chart_png, use_theme
+from excel_ingest import MissingColumnsError
+from export_density import DENSITY_ROWS, TOP_PARTIES, density_scatter_png, party_violins_png
+from sales_analysis import export_summary
+from timeseries_chart import time_series_chart
+from upload_cache import EXPORT_COLUMNS, cached_upload, streamlit_progress
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
 # Streamlit configurations
 st.set_page_config(page_title="Export Sales Analysis", layout="wide")
-sns.set(style="whitegrid")
+use_theme(style="whitegrid")  # seaborn is only imported with the first chart
+TITLE_STYLE = {'fontsize': 14, 'fontweight': 'bold'}
 st.title("📊 Export Sales Analysis Dashboard")
 
 # Sidebar for navigation
@@ -23,13 +26,26 @@ menu = st.sidebar.radio(
     ["Upload Data", "Party Ranking", "Party-Based Analysis", "Design-Based Analysis", "Summary Statistics", "Time-Based Analysis", "Type-Based Analysis", "Size-Based Analysis", "Correlation Analysis", "Scatter & Violin Plots"]
 )
 
+# Section summaries of an upload, rolled up from one aggregation cube
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_summary(digest, _data):
+    return export_summary(_data)
+
 # Upload Excel file
 uploaded_file = st.sidebar.file_uploader("Upload the Export Sales Excel File", type=['xlsx', 'xls'])
 
 if uploaded_file:
-    # Load data
-    data = pd.read_excel(uploaded_file)
-    data['DATE'] = pd.to_datetime(data['DATE'])
+    # Load the analysed columns, once per distinct content (DATE is parsed to datetime)
+    progress_area = st.empty()
+    try:
+        upload = cached_upload(uploaded_file.getvalue(), uploaded_file.name, EXPORT_COLUMNS,
+                               streamlit_progress(progress_area))
+    except MissingColumnsError as e:
+        st.error(f"The file must contain these columns: {EXPORT_COLUMNS} (missing: {e.missing})")
+        st.stop()
+    progress_area.empty()
+    data, digest = upload.data, upload.digest
+    summary = get_summary(digest, data)
 
     # Main Dashboard Content
     if menu == "Upload Data":
@@ -50,53 +66,43 @@ if uploaded_file:
         col1, col2 = st.columns(2)
         with col1:
             st.write("#### Statistics for WEIGHT")
-            st.write(data['WEIGHT'].describe())
+            st.write(summary.statistics['WEIGHT'])
         with col2:
             st.write("#### Statistics for QTY")
-            st.write(data['QTY'].describe())
+            st.write(summary.statistics['QTY'])
 
         st.write("### Unique Values in Categorical Columns")
-        st.write(f"Unique Parties: {data['PARTY'].nunique()}")
-        st.write(f"Unique Types: {data['TYPE'].nunique()}")
-        st.write(f"Unique Sizes: {data['SIZE'].nunique()}")
+        st.write(f"Unique Parties: {summary.unique_counts['PARTY']}")
+        st.write(f"Unique Types: {summary.unique_counts['TYPE']}")
+        st.write(f"Unique Sizes: {summary.unique_counts['SIZE']}")
 
     elif menu == "Time-Based Analysis":
         st.write("### Weight and Quantity Over Time")
-        time_summary = data.groupby('DATE').agg({'WEIGHT': 'sum', 'QTY': 'sum'}).reset_index()
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        sns.lineplot(x='DATE', y='WEIGHT', data=time_summary, marker='o', label='Weight')
-        sns.lineplot(x='DATE', y='QTY', data=time_summary, marker='o', label='Quantity')
-        ax1.set_title("Weight and Quantity Over Time", fontsize=16, fontweight='bold')
-        plt.xlabel("Date")
-        plt.ylabel("Total")
-        plt.legend()
-        st.pyplot(fig1)
+        time_summary = summary.over_time
+        st.plotly_chart(time_series_chart(time_summary, 'DATE', ['WEIGHT', 'QTY'], title="Weight and Quantity Over Time",
+                                          names={'WEIGHT': 'Weight', 'QTY': 'Quantity'}, markers=True,
+                                          labels={'DATE': 'Date', 'value': 'Total', 'variable': ''}),
+                        use_container_width=True)
 
     elif menu == "Party-Based Analysis":
         st.write("### Top and Bottom Parties by Weight")
-        party_summary = data.groupby('PARTY')['WEIGHT'].sum().reset_index()
+        party_summary = summary.parties
         top_10_parties = party_summary.sort_values(by='WEIGHT', ascending=False).head(10)
         bottom_5_parties = party_summary.sort_values(by='WEIGHT').head(5)
 
         col1, col2 = st.columns(2)
         with col1:
             st.write("#### Top 10 Parties")
-            fig2, ax2 = plt.subplots(figsize=(8, 6))
-            sns.barplot(x='WEIGHT', y='PARTY', data=top_10_parties, palette='Blues_r')
-            ax2.set_title("Top 10 Parties by Weight", fontsize=14, fontweight='bold')
-            st.pyplot(fig2)
+            st.image(chart_png('barplot', top_10_parties, x='WEIGHT', y='PARTY', palette='Blues_r', figsize=(8, 6),
+                               title="Top 10 Parties by Weight", title_kw=TITLE_STYLE), width='stretch')
         with col2:
             st.write("#### Bottom 5 Parties")
-            fig3, ax3 = plt.subplots(figsize=(8, 6))
-            sns.barplot(x='WEIGHT', y='PARTY', data=bottom_5_parties, palette='Reds_r')
-            ax3.set_title("Bottom 5 Parties by Weight", fontsize=14, fontweight='bold')
-            st.pyplot(fig3)
+            st.image(chart_png('barplot', bottom_5_parties, x='WEIGHT', y='PARTY', palette='Reds_r', figsize=(8, 6),
+                               title="Bottom 5 Parties by Weight", title_kw=TITLE_STYLE), width='stretch')
 
     elif menu == "Party Ranking":
         st.write("### Party Ranking by Total Weight")
-        party_summary = data.groupby('PARTY')['WEIGHT'].sum().reset_index()
-        party_summary['Rank'] = party_summary['WEIGHT'].rank(ascending=False, method='min')
-        party_summary = party_summary.sort_values(by='Rank')
+        party_summary = summary.parties.sort_values(by='Rank')
 
         st.write("#### Party Ranking Table")
         st.dataframe(party_summary[['Rank', 'PARTY', 'WEIGHT']].style.highlight_max(axis=0, color='lightgreen'))
@@ -109,49 +115,51 @@ if uploaded_file:
 
     elif menu == "Type-Based Analysis":
         st.write("### Type-Based Analysis")
-        type_summary = data.groupby('TYPE').agg({'WEIGHT': 'sum', 'QTY': 'sum'}).reset_index()
-        fig4, ax4 = plt.subplots(figsize=(10, 6))
-        sns.barplot(x='WEIGHT', y='TYPE', data=type_summary, palette='viridis')
-        ax4.set_title("Weight by Type", fontsize=14, fontweight='bold')
-        st.pyplot(fig4)
+        type_summary = summary.types
+        st.image(chart_png('barplot', type_summary, x='WEIGHT', y='TYPE', palette='viridis', figsize=(10, 6),
+                           title="Weight by Type", title_kw=TITLE_STYLE), width='stretch')
 
     elif menu == "Size-Based Analysis":
         st.write("### Size-Based Analysis")
-        size_summary = data.groupby('SIZE').agg({'WEIGHT': 'sum'}).reset_index()
-        fig5, ax5 = plt.subplots(figsize=(10, 6))
-        sns.barplot(x='SIZE', y='WEIGHT', data=size_summary, palette='coolwarm')
-        ax5.set_title("Weight by Size", fontsize=14, fontweight='bold')
-        st.pyplot(fig5)
+        size_summary = summary.sizes
+        st.image(chart_png('barplot', size_summary, x='SIZE', y='WEIGHT', palette='coolwarm', figsize=(10, 6),
+                           title="Weight by Size", title_kw=TITLE_STYLE), width='stretch')
 
     elif menu == "Design-Based Analysis":
         st.write("### Top 5 Designs by Weight")
-        design_summary = data.groupby('DESIGN NO')['WEIGHT'].sum().reset_index()
-        top_5_designs = design_summary.sort_values(by='WEIGHT', ascending=False).head(5)
-        fig6, ax6 = plt.subplots(figsize=(8, 6))
-        sns.barplot(x='WEIGHT', y='DESIGN NO', data=top_5_designs, palette='Greens_r')
-        ax6.set_title("Top 5 Designs by Weight", fontsize=14, fontweight='bold')
-        st.pyplot(fig6)
+        top_5_designs = summary.designs.head(5)
+        st.image(chart_png('barplot', top_5_designs, x='WEIGHT', y='DESIGN NO', palette='Greens_r', figsize=(8, 6),
+                           title="Top 5 Designs by Weight", title_kw=TITLE_STYLE), width='stretch')
 
     elif menu == "Correlation Analysis":
         st.write("### Correlation Analysis")
-        fig7, ax7 = plt.subplots(figsize=(8, 6))
-        sns.heatmap(data[['WEIGHT', 'QTY']].corr(), annot=True, cmap='coolwarm')
-        ax7.set_title("Correlation Matrix", fontsize=14, fontweight='bold')
-        st.pyplot(fig7)
+        st.image(chart_png('heatmap', data[['WEIGHT', 'QTY']].corr(), annot=True, cmap='coolwarm', figsize=(8, 6),
+                           title="Correlation Matrix", title_kw=TITLE_STYLE), width='stretch')
+
+    elif menu == "Scatter & Violin Plots" and len(data) > DENSITY_ROWS:
+        # too many rows to draw one by one: binned densities instead
+        st.caption(f"{len(data):,} rows: showing binned densities, and violins for the top {TOP_PARTIES} "
+                   f"parties by weight.")
+        st.write("### Weight vs Quantity Density")
+        st.image(density_scatter_png(data, key=digest, title="Weight vs Quantity", title_kw=TITLE_STYLE),
+                 width='stretch')
+
+        st.write("### Weight Distribution by Party")
+        top_parties = summary.parties.head(TOP_PARTIES)['PARTY']
+        st.image(party_violins_png(data, top_parties, key=digest, title="Weight Distribution by Party",
+                                   title_kw=TITLE_STYLE), width='stretch')
 
     elif menu == "Scatter & Violin Plots":
         st.write("### Weight vs Quantity Scatter Plot")
-        fig8, ax8 = plt.subplots(figsize=(8, 6))
-        sns.scatterplot(x='WEIGHT', y='QTY', data=data, hue='TYPE', palette='tab10')
-        ax8.set_title("Weight vs Quantity", fontsize=14, fontweight='bold')
-        st.pyplot(fig8)
+        # drawn from the whole upload, so keyed by its digest rather than hashing the rows
+        st.image(chart_png('scatterplot', data, key=(digest, 'scatter'), x='WEIGHT', y='QTY', hue='TYPE',
+                           palette='tab10', figsize=(8, 6), title="Weight vs Quantity", title_kw=TITLE_STYLE),
+                 width='stretch')
 
         st.write("### Weight Distribution by Party")
-        fig9, ax9 = plt.subplots(figsize=(10, 6))
-        sns.violinplot(x='PARTY', y='WEIGHT', data=data, scale='width')
-        plt.xticks(rotation=45)
-        ax9.set_title("Weight Distribution by Party", fontsize=14, fontweight='bold')
-        st.pyplot(fig9)
+        st.image(chart_png('violinplot', data, key=(digest, 'violin'), x='PARTY', y='WEIGHT', scale='width',
+                           figsize=(10, 6), xtick_rotation=45, title="Weight Distribution by Party",
+                           title_kw=TITLE_STYLE), width='stretch')
 
 else:
     st.info("📂 Please upload a valid Excel file to begin analysis.")
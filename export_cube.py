@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Aggregation cube behind the export sales dashboard sections.
+
+An ExportCube is built once per upload: WEIGHT and QTY sums and the row count
+for every PARTY x TYPE x SIZE x DESIGN NO x DATE combination that occurs,
+stored sparse as one entry per occupied cell. Dimension values are kept as
+integer codes into their sorted distinct values, so a section's summary is a
+bincount over the cells rather than a groupby over the uploaded rows. Rollups
+are memoized, and switching sections does not rescan anything.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['PARTY', 'TYPE', 'SIZE', 'DESIGN NO', 'DATE']
+MEASURES = ['WEIGHT', 'QTY']
+
+
+def _cell_ids(codes, shape):
+    """(cell id per entry, number of distinct cells) for combined integer codes."""
+    try:
+        flat = np.ravel_multi_index(codes, shape)
+    except ValueError:  # too many combinations for one integer
+        flat = pd.DataFrame(dict(enumerate(codes))).groupby(list(range(len(codes)))).ngroup().to_numpy()
+    if np.prod(shape, dtype=float) <= 4 * len(flat) + 1024:
+        return flat, int(np.prod(shape))
+    ids, inverse = np.unique(flat, return_inverse=True)
+    return inverse, len(ids)
+
+
+class ExportCube:
+    def __init__(self, df):
+        # code 0 is a missing value; value i (sorted) has code i + 1
+        self.values = {}
+        codes = []
+        for dim in DIMENSIONS:
+            dim_codes, uniques = pd.factorize(df[dim], sort=True)
+            self.values[dim] = uniques
+            codes.append(dim_codes + 1)
+        shape = [len(self.values[dim]) + 1 for dim in DIMENSIONS]
+
+        ids, n_cells = _cell_ids(codes, shape)
+        rows = np.bincount(ids, minlength=n_cells)
+        occupied = np.flatnonzero(rows)
+        member = np.empty(n_cells, dtype=np.int64)
+        member[ids] = np.arange(len(ids))  # some row of each cell, to read the cell's codes from
+        self.codes = {dim: code[member[occupied]].astype(np.int32) for dim, code in zip(DIMENSIONS, codes)}
+        self.rows = rows[occupied]
+        self.sums = {m: np.bincount(ids, weights=df[m].to_numpy(dtype=float, na_value=0), minlength=n_cells)[occupied]
+                     for m in MEASURES}
+        self.dtypes = {m: df[m].dtype for m in MEASURES}
+        self.lock = threading.Lock()
+        self._rollups = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def rollup(self, by):
+        """WEIGHT, QTY and ROWS totals by the dimension(s) `by`, sorted by key.
+
+        Like a groupby on the uploaded rows: rows missing a `by` value are left
+        out. The result is a copy, free to modify.
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        with self.lock:
+            if by not in self._rollups:
+                self._rollups[by] = self._rollup(by)
+            return self._rollups[by].copy()
+
+    def _rollup(self, by):
+        codes = [self.codes[dim] for dim in by]
+        shape = [len(self.values[dim]) + 1 for dim in by]
+        ids, n_groups = _cell_ids(codes, shape)
+        rows = np.bincount(ids, weights=self.rows, minlength=n_groups)
+        keep = np.zeros(n_groups, dtype=bool)
+        keep[ids[np.all([code > 0 for code in codes], axis=0)]] = True
+        keep &= rows > 0
+        member = np.empty(n_groups, dtype=np.int64)
+        member[ids] = np.arange(len(ids))
+        cells = member[keep]
+
+        result = {dim: self.values[dim][code[cells] - 1] for dim, code in zip(by, codes)}
+        for m in MEASURES:
+            sums = np.bincount(ids, weights=self.sums[m], minlength=n_groups)[keep]
+            result[m] = sums.round().astype(np.int64) if pd.api.types.is_integer_dtype(self.dtypes[m]) else sums
+        result['ROWS'] = rows[keep].astype(np.int64)
+        return pd.DataFrame(result)
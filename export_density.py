@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Binned density charts for large export uploads.
+
+Above DENSITY_ROWS rows a point per row and a KDE per party are slow to draw
+and unreadable, so the Scatter & Violin section switches to pre-binned
+views computed with NumPy: a WEIGHT x QTY 2D histogram, and violins for the
+top parties drawn from per-party WEIGHT histograms on shared bins, with the
+quartiles marked.
+"""
+
+import numpy as np
+import pandas as pd
+
+from chart_render import figure_png
+
+DENSITY_ROWS = 50_000
+TOP_PARTIES = 20
+WEIGHT_BINS = 100
+QTY_BINS = 60
+
+
+def _edges(values, bins):
+    lo, hi = (float(values.min()), float(values.max())) if len(values) else (0.0, 1.0)
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def _qty_edges(qty, bins=QTY_BINS):
+    # one bin per quantity when they are whole numbers in a short range
+    if len(qty) and np.all(qty == np.round(qty)) and qty.max() - qty.min() < bins:
+        return np.arange(qty.min() - 0.5, qty.max() + 1.5)
+    return _edges(qty, bins)
+
+
+def weight_qty_histogram(df, weight_bins=WEIGHT_BINS):
+    """(row counts, WEIGHT edges, QTY edges) of the rows with both values."""
+    weight = df['WEIGHT'].to_numpy(dtype=float, na_value=np.nan)
+    qty = df['QTY'].to_numpy(dtype=float, na_value=np.nan)
+    valid = np.isfinite(weight) & np.isfinite(qty)
+    weight, qty = weight[valid], qty[valid]
+    counts, weight_edges, qty_edges = np.histogram2d(weight, qty, bins=[_edges(weight, weight_bins), _qty_edges(qty)])
+    return counts, weight_edges, qty_edges
+
+
+def party_weight_histograms(df, parties, bins=WEIGHT_BINS):
+    """(counts per party x bin, WEIGHT edges, quartiles per party) for `parties`."""
+    rows = df[df['PARTY'].isin(parties)]
+    weight = rows['WEIGHT'].to_numpy(dtype=float, na_value=np.nan)
+    valid = np.isfinite(weight)
+    codes = pd.Categorical(rows['PARTY'], categories=parties).codes[valid].astype(np.int64)
+    weight = weight[valid]
+    edges = _edges(weight, bins)
+    slots = np.clip(np.searchsorted(edges, weight, side='right') - 1, 0, bins - 1)
+    counts = np.bincount(codes * bins + slots, minlength=len(parties) * bins).reshape(len(parties), bins)
+    quartiles = rows.groupby('PARTY')['WEIGHT'].quantile([0.25, 0.5, 0.75]).unstack().reindex(parties)
+    return counts, edges, quartiles
+
+
+def density_scatter_png(df, key, figsize=(8, 6), title=None, title_kw=None):
+    """PNG of the WEIGHT x QTY row density; `key` identifies `df`."""
+    def draw(ax):
+        from matplotlib.colors import LogNorm
+
+        counts, weight_edges, qty_edges = weight_qty_histogram(df)
+        counts = np.ma.masked_equal(counts.T, 0)
+        mesh = ax.pcolormesh(weight_edges, qty_edges, counts, cmap='viridis',
+                             norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)))
+        ax.figure.colorbar(mesh, ax=ax, label='Rows')
+        ax.set_xlabel('WEIGHT')
+        ax.set_ylabel('QTY')
+        if title is not None:
+            ax.set_title(title, **(title_kw or {}))
+
+    return figure_png((key, 'density_scatter', title, repr(sorted((title_kw or {}).items()))), draw, figsize)
+
+
+def party_violins_png(df, parties, key, figsize=(10, 6), title=None, title_kw=None):
+    """PNG of WEIGHT violins (equal width) for `parties`; `key` identifies `df`."""
+    parties = list(parties)
+
+    def draw(ax):
+        counts, edges, quartiles = party_weight_histograms(df, parties)
+        centers = (edges[:-1] + edges[1:]) / 2
+        for i, party in enumerate(parties):
+            if counts[i].max() == 0:
+                continue
+            shape = np.convolve(counts[i], [0.25, 0.5, 0.25], mode='same')  # light smoothing
+            half_width = 0.4 * shape / shape.max()
+            ax.fill_betweenx(centers, i - half_width, i + half_width, color=f"C{i % 10}", alpha=0.7, linewidth=0)
+            q1, median, q3 = quartiles.loc[party]
+            ax.vlines(i, q1, q3, color='black', linewidth=3)
+            ax.plot(i, median, 'o', color='white', markersize=4)
+        ax.set_xticks(range(len(parties)), parties)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.set_xlabel('PARTY')
+        ax.set_ylabel('WEIGHT')
+        if title is not None:
+            ax.set_title(title, **(title_kw or {}))
+
+    return figure_png((key, 'party_violins', tuple(parties), title, repr(sorted((title_kw or {}).items()))),
+                      draw, figsize)
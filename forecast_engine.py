@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Linear stock forecasts for many series at once.
+
+WT is resampled to daily totals for the whole inventory, for every CATEGORY
+and for the top designs, and a straight line is fitted to all those series
+with a single least-squares solve. Built once per data snapshot, after which
+forecasting any series is just evaluating its line.
+"""
+
+import numpy as np
+import pandas as pd
+
+TOTAL = "Overall"
+
+
+def _daily_matrix(day, weights, keys, n_days):
+    """Daily totals per key: (n_days x n_keys) matrix and the key labels."""
+    codes, labels = pd.factorize(keys, sort=True)
+    valid = codes >= 0
+    flat = day[valid] * len(labels) + codes[valid]
+    totals = np.bincount(flat, weights=weights[valid], minlength=n_days * len(labels))
+    return totals.reshape(n_days, len(labels)), list(labels)
+
+
+class ForecastEngine:
+    def __init__(self, df, top_designs=20):
+        wt = pd.to_numeric(df['WT'], errors='coerce')
+        keep = (df['DATE'].notna() & np.isfinite(wt) & (wt > 0)).to_numpy()
+        clean = df[keep]
+        wt = wt[keep].to_numpy(dtype=float)
+        self.groups = {}
+        if clean.empty:
+            self.dates = pd.DatetimeIndex([])
+            self.series = pd.DataFrame()
+            self.coef = pd.DataFrame(columns=['intercept', 'slope'])
+            return
+
+        dates = clean['DATE'].dt.normalize()
+        start = dates.min()
+        day = (dates - start).dt.days.to_numpy()
+        n_days = int(day.max()) + 1
+        self.dates = pd.date_range(start, periods=n_days, freq='D')
+
+        blocks = [np.bincount(day, weights=wt, minlength=n_days).reshape(-1, 1)]
+        columns = [(TOTAL, TOTAL)]
+        self.groups[TOTAL] = [TOTAL]
+
+        if 'CATEGORY' in clean.columns:
+            matrix, labels = _daily_matrix(day, wt, clean['CATEGORY'].astype(str).to_numpy(), n_days)
+            blocks.append(matrix)
+            columns += [('CATEGORY', label) for label in labels]
+            self.groups['CATEGORY'] = labels
+
+        if 'DESIGN NO' in clean.columns and top_designs:
+            design = clean['DESIGN NO'].astype(str)
+            top = pd.Series(wt, index=design.index).groupby(design.to_numpy()).sum().nlargest(top_designs).index
+            keys = design.where(design.isin(top)).to_numpy(dtype=object)
+            matrix, labels = _daily_matrix(day, wt, keys, n_days)
+            blocks.append(matrix)
+            columns += [('DESIGN NO', label) for label in labels]
+            self.groups['DESIGN NO'] = labels
+
+        # Fit every series in one solve: Y (days x series) ~ [1, day] @ coef
+        y = np.hstack(blocks)
+        x = np.column_stack([np.ones(n_days), np.arange(n_days)])
+        coef, *_ = np.linalg.lstsq(x, y, rcond=None)
+        index = pd.MultiIndex.from_tuples(columns, names=['GROUP', 'NAME'])
+        self.series = pd.DataFrame(y, index=self.dates, columns=index)
+        self.coef = pd.DataFrame(coef.T, index=index, columns=['intercept', 'slope'])
+
+    @property
+    def empty(self):
+        return self.series.empty
+
+    def names(self, group):
+        return self.groups.get(group, [])
+
+    def history(self, group, name):
+        """Daily WT totals of one series."""
+        return pd.DataFrame({'DATE': self.dates, 'WT': self.series[(group, name)].to_numpy()})
+
+    def forecast(self, group, name, horizon=30):
+        """Predicted daily WT of one series over the next `horizon` days."""
+        intercept, slope = self.coef.loc[(group, name)]
+        days = np.arange(len(self.dates), len(self.dates) + horizon)
+        future = pd.date_range(self.dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+        return pd.DataFrame({'DATE': future, 'Predicted WT': intercept + slope * days})
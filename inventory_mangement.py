@@ -1,58 +1,120 @@
 # -*- coding: utf-8 -*-
 """Inventory_Mangement.ipynb"""
 
+import os
 import streamlit as st
 import pandas as pd
 import datetime
-import requests
-import plotly.express as px
-import numpy as np
-from io import BytesIO
-from sklearn.linear_model import LinearRegression
-import schedule
-import time
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import threading
-from fpdf import FPDF  # Import FPDF for PDF generation
-
-# Google Sheet URLs
-SALES_SHEET_URL = "https://docs.google.com/spreadsheets/d/1Jwx4TntDxlwghFn_eC_NgooXlpvR6WTDdvWy4PO0zgk/export?format=csv&gid=2076018430"
-FACTORY_SHEET_URL = "https://docs.google.com/spreadsheets/d/1Jwx4TntDxlwghFn_eC_NgooXlpvR6WTDdvWy4PO0zgk/export?format=csv&gid=0"
-
-# Function to load data from Google Sheets
+import tempfile
+from inventory_snapshot import sync_sheets
+from sheet_fetcher import sheet_url
+from category_engine import classify_designs
+from search_index import SearchIndex, cell_matches
+from aging_engine import AgingEngine, AGED_DAYS
+from pdf_report import write_inventory_report
+from report_scheduler import get_report_service
+from forecast_engine import ForecastEngine, TOTAL
+from dashboard_rollups import RollupStore
+from paginated_table import paginated_dataframe
+from compact_inventory import SOURCE_COLUMN, combine_sources
+from timeseries_chart import time_series_chart
+from data_export import EXPORT_FORMATS, PARQUET_COMPRESSION, select_rows, export_file
+
+# Google Sheet URLs (override with a local CSV path, or SHEETS_BASE_URL, for testing)
+SALES_SHEET_URL = os.environ.get("SALES_SHEET_URL", sheet_url("2076018430"))
+FACTORY_SHEET_URL = os.environ.get("FACTORY_SHEET_URL", sheet_url("0"))
+
+# E-mail delivery of the stock report (credentials only come from the environment)
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USER = os.environ.get("SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") == "1"
+REPORT_SENDER = os.environ.get("REPORT_SENDER", SMTP_USER)
+REPORT_RECIPIENTS = [r for r in os.environ.get("REPORT_RECIPIENTS", "").split(",") if r.strip()]
+# A sender is required, and a password when logging in (a local relay needs no login)
+EMAIL_CONFIGURED = bool(REPORT_SENDER) and bool(SMTP_PASSWORD or not SMTP_USER)
+
+# Function to load data from the local sheet snapshots (synced with Google Sheets)
 def load_data():
-    sales_df = pd.read_csv(SALES_SHEET_URL)
-    factory_df = pd.read_csv(FACTORY_SHEET_URL)
-    
-    sales_df['DATE'] = pd.to_datetime(sales_df['DATE'], errors='coerce')
-    factory_df['DATE'] = pd.to_datetime(factory_df['DATE'], errors='coerce')
-    
-    sales_df = sales_df[~sales_df['DELIVERED'].astype(str).str.lower().eq('out')]
-    factory_df = factory_df[~factory_df['DELIVERED'].astype(str).str.lower().eq('out')]
-    
-    return sales_df, factory_df
+    snapshots = sync_sheets({"sales": SALES_SHEET_URL, "factory": FACTORY_SHEET_URL})
+    return snapshots["sales"], snapshots["factory"]
+
+# Function to drop delivered items and add the CATEGORY column
+def prepare_inventory(df):
+    df = df[~df['DELIVERED'].astype(str).str.lower().eq('out')].copy()
+    df['CATEGORY'] = classify_designs(df['DESIGN NO'])
+    return df
+
+# Compact combined inventory, built once per snapshot
+@st.cache_resource(max_entries=1)
+def get_inventory(snapshot_version, _sales_snapshot, _factory_snapshot):
+    return combine_sources({"Sales": prepare_inventory(_sales_snapshot.frame),
+                            "Factory": prepare_inventory(_factory_snapshot.frame)})
 
-# Function to extract category
-def extract_category(design_no):
-    categories = ["CM", "CL", "CN", "CZ", "EX", "FR", "FS", "GL", "GT", "OP", "PL", "LN", "LO", "MD", "MV", "NA", "SP", "SPE", "UN"]
-    for category in categories:
-        if category in design_no:
-            return category
-    return "Other"
+# Search index over one inventory frame, built once per data snapshot; the SOURCE
+# label is not searched or shown, like the sheets' columns before they were combined
+@st.cache_resource(max_entries=6)
+def get_search_index(snapshot_version, name, _df):
+    return SearchIndex(_df.drop(columns=SOURCE_COLUMN, errors='ignore'))
 
-# Load Data
-sales_df, factory_df = load_data()
+# Aging engine over one or more inventory frames, rebuilt per snapshot and per day
+@st.cache_resource(max_entries=6)
+def get_aging_engine(snapshot_version, today, name, _df):
+    return AgingEngine(_df)
 
-sales_df['CATEGORY'] = sales_df['DESIGN NO'].astype(str).apply(extract_category)
-factory_df['CATEGORY'] = factory_df['DESIGN NO'].astype(str).apply(extract_category)
+# Forecast lines for all series (overall, per category, top designs), fitted once per snapshot
+@st.cache_resource(max_entries=2)
+def get_forecast_engine(snapshot_version, _df):
+    return ForecastEngine(_df)
+
+# Dashboard totals, shared by all sessions and updated from snapshot deltas
+@st.cache_resource
+def get_rollup_store():
+    return RollupStore()
+
+# Function to render the stock report PDF (spills to disk above 8 MB)
+def render_report(sales_df, factory_df, aging):
+    pdf_output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    write_inventory_report(pdf_output, sales_df, factory_df, aging, AGED_DAYS)
+    pdf_output.seek(0)
+    return pdf_output
+
+# Scheduled report: reloads the latest snapshot on the delivery thread
+def build_scheduled_report():
+    report_sales, report_factory = load_data()
+    report_df, report_sources = combine_sources({"Sales": prepare_inventory(report_sales.frame),
+                                                 "Factory": prepare_inventory(report_factory.frame)})
+    aging = AgingEngine(report_df)
+    return render_report(report_sources["Sales"], report_sources["Factory"], aging).read()
+
+# One scheduler and delivery worker per process; the weekly job is registered once.
+# Without e-mail settings nothing is scheduled and the Reports page only offers the download.
+report_service = None
+if EMAIL_CONFIGURED:
+    report_service = get_report_service(SMTP_HOST, SMTP_PORT, REPORT_SENDER, SMTP_USER, SMTP_PASSWORD,
+                                        starttls=SMTP_STARTTLS)
+    if REPORT_RECIPIENTS:
+        report_service.schedule_weekly("weekly-stock-report", "monday", "08:00", REPORT_RECIPIENTS,
+                                       build_scheduled_report)
 
 # Sidebar Navigation
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Home", "Dashboard", "Aged Stock", "Inventory Data", "Export Data", "Stock Forecast", "Reports"])
 
-st.experimental_set_query_params(page=page)
+st.query_params["page"] = page
+
+# Load Data, except for the Home page, which renders without waiting on the sheet download
+if page != "Home":
+    sales_snapshot, factory_snapshot = load_data()
+
+    # Identifies this pair of sheet snapshots for the per-snapshot caches above
+    snapshot_version = sales_snapshot.digest[:16] + factory_snapshot.digest[:16]
+
+    # One compact frame with a SOURCE column; sales_df and factory_df are slices of it
+    inventory_df, inventory_sources = get_inventory(snapshot_version, sales_snapshot, factory_snapshot)
+    sales_df = inventory_sources["Sales"]
+    factory_df = inventory_sources["Factory"]
 
 # Clear previous pages when navigating
 def clear_page():
@@ -67,20 +129,24 @@ if page == "Home":
 elif page == "Dashboard":
     clear_page()
     st.title("Stock Inventory Dashboard")
-    total_sales_weight = sales_df['WT'].sum()
-    total_factory_weight = factory_df['WT'].sum()
+    import plotly.express as px
+    rollups = get_rollup_store()
+    rollups.sync("Sales", sales_snapshot, sales_df, prepare_inventory)
+    rollups.sync("Factory", factory_snapshot, factory_df, prepare_inventory)
+    total_sales_weight = rollups.total("Sales")
+    total_factory_weight = rollups.total("Factory")
     overall_weight = total_sales_weight + total_factory_weight
     
     st.metric("Total Sales Weight (WT)", total_sales_weight)
     st.metric("Total Factory Stock Weight (WT)", total_factory_weight)
     st.metric("Overall Inventory Weight (WT)", overall_weight)
     
-    category_weight = sales_df.groupby('CATEGORY')['WT'].sum().reset_index()
+    category_weight = rollups.category_totals("Sales")
     fig = px.bar(category_weight, x='CATEGORY', y='WT', title="Sales Weight by Category")
     st.plotly_chart(fig)
     
-    sales_trend = sales_df.groupby('DATE')['WT'].sum().reset_index()
-    fig2 = px.line(sales_trend, x='DATE', y='WT', title="Sales Trend Over Time")
+    sales_trend = rollups.date_totals("Sales")
+    fig2 = time_series_chart(sales_trend, 'DATE', 'WT', title="Sales Trend Over Time", key=("sales_trend", snapshot_version))
     st.plotly_chart(fig2)
 
 # Aged Stock Page
@@ -94,37 +160,44 @@ elif page == "Aged Stock":
     # Add inventory selection option
     inventory_option_aged = st.selectbox("Select Inventory Data for Aged Stock", ["Sales Inventory", "Factory Inventory", "Both"])
     
+    # Minimum age (days) for an item to count as aged
+    aged_days = st.number_input("Minimum Age (Days)", min_value=0, value=AGED_DAYS, step=1)
+    
     # Filter data based on the selected inventory option
     if inventory_option_aged == "Sales Inventory":
-        aged_df = sales_df.copy()
+        aged_base = sales_df
     elif inventory_option_aged == "Factory Inventory":
-        aged_df = factory_df.copy()
+        aged_base = factory_df
     else:
-        aged_df = pd.concat([sales_df, factory_df], ignore_index=True)
+        aged_base = inventory_df
+    aging = get_aging_engine(snapshot_version, datetime.date.today(), inventory_option_aged, aged_base)
     
-    # Filter out items marked as "out" (delivered)
-    aged_df = aged_df[~aged_df['DELIVERED'].astype(str).str.lower().eq('out')]
+    # Undelivered items older than the threshold, with their AGE (days since DATE)
+    aged_stock = aging.older_than(aged_days)
     
-    # Calculate the age of each item (days since DATE)
-    aged_df['AGE'] = (datetime.datetime.now() - aged_df['DATE']).dt.days
-    
-    # Filter items that have been in inventory for more than 10 days
-    aged_stock = aged_df[aged_df['AGE'] > 10]
-    
-    # Apply search filter (if search query is provided)
+    # Apply search filter (if search query is provided); AGE is not in the index
     if search_query_aged:
-        aged_stock = aged_stock[aged_stock.astype(str).apply(lambda x: x.str.contains(search_query_aged, case=False, na=False)).any(axis=1)]
+        search_index = get_search_index(snapshot_version, inventory_option_aged, aging.frame)
+        hits = search_index.mask(search_query_aged)[aging.rows_older_than(aged_days)]
+        aged_stock = aged_stock[hits | cell_matches(aged_stock[['AGE']], search_query_aged)]
     
     # Display the aged stock
     st.write(f"Total Aged Stock Items: {len(aged_stock)}")
     
     # Show a breakdown of aged stock by category
     st.write("Aged Stock by Category:")
-    aged_stock_by_category = aged_stock.groupby('CATEGORY').size().reset_index(name='Count')
+    if search_query_aged:
+        aged_stock_by_category = aged_stock.groupby('CATEGORY', observed=True).size().reset_index(name='Count')
+    else:
+        aged_stock_by_category = aging.category_counts(aged_days)
     st.dataframe(aged_stock_by_category)
     
-    # Display the full aged stock dataframe
-    st.dataframe(aged_stock)
+    st.write("Stock by Category and Age (Days):")
+    st.dataframe(aging.histogram)
+    
+    # Display the full aged stock dataframe, one page at a time
+    paginated_dataframe(aged_stock, "aged_stock", key=(snapshot_version, datetime.date.today(), inventory_option_aged, aged_days, search_query_aged),
+                        hide=(SOURCE_COLUMN,))
 
 # Inventory Data Page
 elif page == "Inventory Data":
@@ -137,15 +210,12 @@ elif page == "Inventory Data":
     inventory_option = st.selectbox("Select Inventory Data", ["Sales Inventory", "Factory Inventory", "Both"])
     
     if inventory_option == "Sales Inventory":
-        filtered_df = sales_df[sales_df.astype(str).apply(lambda x: x.str.contains(search_query, case=False, na=False)).any(axis=1)]
-        st.dataframe(filtered_df)
+        filtered_df = get_search_index(snapshot_version, inventory_option, sales_df).search(search_query)
     elif inventory_option == "Factory Inventory":
-        filtered_df = factory_df[factory_df.astype(str).apply(lambda x: x.str.contains(search_query, case=False, na=False)).any(axis=1)]
-        st.dataframe(filtered_df)
+        filtered_df = get_search_index(snapshot_version, inventory_option, factory_df).search(search_query)
     else:
-        combined_df = pd.concat([sales_df, factory_df], ignore_index=True)
-        filtered_df = combined_df[combined_df.astype(str).apply(lambda x: x.str.contains(search_query, case=False, na=False)).any(axis=1)]
-        st.dataframe(filtered_df)
+        filtered_df = get_search_index(snapshot_version, inventory_option, inventory_df).search(search_query)
+    paginated_dataframe(filtered_df, "inventory", key=(snapshot_version, inventory_option, search_query))
 
 # Export Data Page
 elif page == "Export Data":
@@ -160,68 +230,56 @@ elif page == "Export Data":
     else:
         export_df = factory_df
     
-    csv = export_df.to_csv(index=False).encode('utf-8')
-    st.download_button("Download CSV", data=csv, file_name="Filtered_Inventory.csv", mime='text/csv')
+    
+    sheet_columns = [c for c in export_df.columns if c != SOURCE_COLUMN]
+    export_columns = st.multiselect("Columns", sheet_columns, default=sheet_columns)
+    date_range = None
+    if 'DATE' in export_df.columns and export_df['DATE'].notna().any():
+        first_date, last_date = export_df['DATE'].min().date(), export_df['DATE'].max().date()
+        picked = st.date_input("Date range", value=(first_date, last_date), min_value=first_date, max_value=last_date)
+        # the full span is no filter: rows without a DATE are exported too
+        if isinstance(picked, (tuple, list)) and len(picked) == 2 and tuple(picked) != (first_date, last_date):
+            date_range = picked
+    export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+    compression = "zstd"
+    if export_format == "Parquet":
+        compression = st.selectbox("Compression", PARQUET_COMPRESSION)
+    
+    export_df = select_rows(export_df, export_columns, date_range)
+    st.write(f"{len(export_df):,} rows × {len(export_columns)} columns")
+    extension, mime = EXPORT_FORMATS[export_format]
+    # The file is only written when the button is clicked
+    st.download_button(f"Download {export_format}", data=lambda: export_file(export_df, export_format, compression),
+                       file_name=f"Filtered_Inventory.{extension}", mime=mime, disabled=not export_columns)
 
 # Stock Forecast Page
 elif page == "Stock Forecast":
     clear_page()
     st.title("Stock Forecasting")
+    import plotly.express as px
     
-    # Debug: Display the first few rows of the data
-    st.write("First few rows of the data:", sales_df.head())
-    
-    # Debug: Check for missing values in 'DATE' and 'WT'
-    st.write("Missing values in 'DATE':", sales_df['DATE'].isnull().sum())
-    st.write("Missing values in 'WT':", sales_df['WT'].isnull().sum())
-    
-    # Debug: Check for infinite values in 'WT'
-    st.write("Infinite values in 'WT':", np.isinf(sales_df['WT']).sum())
-    
-    # Clean the data: Drop rows with missing or invalid values
-    sales_df_clean = sales_df.dropna(subset=['DATE', 'WT'])  # Drop rows with missing DATE or WT
-    sales_df_clean = sales_df_clean[sales_df_clean['WT'] > 0]  # Ensure WT is positive
-    
-    # Debug: Display the cleaned data
-    st.write("Cleaned data:", sales_df_clean.head())
+    forecaster = get_forecast_engine(snapshot_version, sales_df)
     
     # Check if there is enough data for forecasting
-    if len(sales_df_clean) == 0:
+    if forecaster.empty:
         st.error("No valid data available for forecasting.")
     else:
-        # Prepare data for forecasting
-        sales_df_clean['Day'] = (sales_df_clean['DATE'] - sales_df_clean['DATE'].min()).dt.days
-        X = sales_df_clean[['Day']].values  # Convert to NumPy array
-        y = sales_df_clean['WT'].values  # Convert to NumPy array
+        forecast_groups = {"Overall": TOTAL, "By Category": "CATEGORY", "By Top Design": "DESIGN NO"}
+        forecast_by = st.selectbox("Forecast", [label for label, group in forecast_groups.items() if forecaster.names(group)])
+        group = forecast_groups[forecast_by]
+        name = st.selectbox("Series", forecaster.names(group)) if group != TOTAL else TOTAL
         
-        # Debug: Display the shape of X and y
-        st.write("Shape of X:", X.shape)
-        st.write("Shape of y:", y.shape)
+        # Daily totals so far and the predicted daily WT for the next 30 days
+        history = forecaster.history(group, name)
+        forecast_df = forecaster.forecast(group, name, horizon=30)
+        chart_df = pd.concat([
+            history.assign(Series="Actual"),
+            forecast_df.rename(columns={'Predicted WT': 'WT'}).assign(Series="Forecast"),
+        ], ignore_index=True)
         
-        # Check for finite values in X and y
-        if not np.isfinite(X).all() or not np.isfinite(y).all():
-            st.error("Data contains non-finite values. Please clean the data.")
-        else:
-            # Fit the Linear Regression model
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Predict for the next 30 days
-            future_days = np.array([[i] for i in range(X.max() + 1, X.max() + 31)])  # X is now a NumPy array
-            future_predictions = model.predict(future_days)
-            
-            # Debug: Display the future predictions
-            st.write("Future predictions:", future_predictions)
-            
-            # Create a DataFrame for the forecast
-            forecast_df = pd.DataFrame({"Day": future_days.flatten(), "Predicted WT": future_predictions})
-            
-            # Debug: Display the forecast DataFrame
-            st.write("Forecast DataFrame:", forecast_df)
-            
-            # Plot the forecast
-            fig = px.line(forecast_df, x='Day', y='Predicted WT', title="Stock Prediction for Next 30 Days")
-            st.plotly_chart(fig)
+        fig = px.line(chart_df, x='DATE', y='WT', color='Series', title=f"Stock Prediction for Next 30 Days ({name})")
+        st.plotly_chart(fig)
+        st.dataframe(forecast_df)
 
 # Reports Page
 elif page == "Reports":
@@ -230,45 +288,8 @@ elif page == "Reports":
 
     # Function to generate the report as a PDF
     def generate_pdf_report():
-        # Create a PDF object
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        # Add Dashboard Data to the PDF
-        pdf.cell(200, 10, txt="Dashboard Summary", ln=True, align="C")
-        total_sales_weight = sales_df['WT'].sum()
-        total_factory_weight = factory_df['WT'].sum()
-        overall_weight = total_sales_weight + total_factory_weight
-        pdf.cell(200, 10, txt=f"- Total Sales Weight (WT): {total_sales_weight}", ln=True)
-        pdf.cell(200, 10, txt=f"- Total Factory Stock Weight (WT): {total_factory_weight}", ln=True)
-        pdf.cell(200, 10, txt=f"- Overall Inventory Weight (WT): {overall_weight}", ln=True)
-
-        # Add Aged Stock Data to the PDF
-        pdf.cell(200, 10, txt="Aged Stock Summary", ln=True, align="C")
-        aged_df = pd.concat([sales_df, factory_df], ignore_index=True)
-        aged_df = aged_df[~aged_df['DELIVERED'].astype(str).str.lower().eq('out')]
-        aged_df['AGE'] = (datetime.datetime.now() - aged_df['DATE']).dt.days
-        aged_stock = aged_df[aged_df['AGE'] > 10]
-        pdf.cell(200, 10, txt=f"- Total Aged Stock Items: {len(aged_stock)}", ln=True)
-
-        # Add Aged Stock by Category to the PDF
-        pdf.cell(200, 10, txt="Aged Stock by Category:", ln=True)
-        aged_stock_by_category = aged_stock.groupby('CATEGORY').size().reset_index(name='Count')
-        for _, row in aged_stock_by_category.iterrows():
-            pdf.cell(200, 10, txt=f"- {row['CATEGORY']}: {row['Count']}", ln=True)
-
-        # Add the entire Aged Stock Data to the PDF
-        pdf.cell(200, 10, txt="Full Aged Stock Data:", ln=True, align="C")
-        pdf.set_font("Arial", size=10)
-        for _, row in aged_stock.iterrows():
-            pdf.cell(200, 10, txt=f"Design No: {row['DESIGN NO']}, Category: {row['CATEGORY']}, Weight: {row['WT']}, Age: {row['AGE']} days", ln=True)
-
-        # Save the PDF to a BytesIO object
-        pdf_output = BytesIO()
-        pdf_output.write(pdf.output(dest='S').encode('latin-1'))  # Write PDF content to BytesIO
-        pdf_output.seek(0)
-        return pdf_output
+        aging = get_aging_engine(snapshot_version, datetime.date.today(), "Both", inventory_df)
+        return render_report(sales_df, factory_df, aging)
 
     # Display the report when the "Generate Report" button is clicked
     if st.button("Generate Report"):
@@ -276,54 +297,39 @@ elif page == "Reports":
         st.success("Report generated successfully!")
         st.download_button(
             label="Download Report as PDF",
-            data=pdf_output,
+            data=pdf_output.read(),
             file_name="inventory_report.pdf",
             mime="application/pdf"
         )
 
-    # Email functionality (optional)
+    # Email functionality: the report is built and sent on the delivery worker
     def send_report(receiver_email):
-        sender_email = "ruchitsanap00@gmail.com"
-        subject = "Stock Report"
-        body = "Please find the attached stock report."
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = receiver_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        # Attach the PDF report
-        pdf_output = generate_pdf_report()
-        attachment = MIMEText(pdf_output.getvalue(), 'base64', 'application/pdf')
-        attachment.add_header('Content-Disposition', 'attachment', filename="inventory_report.pdf")
-        msg.attach(attachment)
-
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login("ruchitsanap00@gmail.com", "blhm mtru wcbn wqza")
-            server.sendmail(sender_email, receiver_email, msg.as_string())
-        
-        st.success("Report Sent Successfully")
+        aging = get_aging_engine(snapshot_version, datetime.date.today(), "Both", inventory_df)
+        report_frames = (sales_df, factory_df)
+        job_id = report_service.submit(receiver_email, lambda: render_report(*report_frames, aging).read())
+        st.session_state['report_job'] = job_id
 
     # Email input and send button
     receiver_email = st.text_input("Enter Email Address to Send Report")
     if st.button("Send Report via Email"):
-        if receiver_email:
+        if report_service is None:
+            st.error("E-mail is not configured: set SMTP_USER, SMTP_PASSWORD and REPORT_SENDER.")
+        elif receiver_email:
             send_report(receiver_email)
         else:
             st.error("Please enter a valid email address.")
 
-    # Schedule reports (optional)
-    def schedule_report():
-        send_report("recipient@example.com")
-
-    schedule.every().monday.at("08:00").do(schedule_report)
-    st.write("Reports are automatically sent every Monday at 08:00 AM.")
+    # Status of the last report sent from this session
+    report_job = st.session_state.get('report_job')
+    job_status = report_service.status(report_job) if report_job and report_service else None
+    if job_status:
+        if job_status['state'] == 'sent':
+            st.success("Report Sent Successfully")
+        elif job_status['state'] == 'failed':
+            st.error(f"Sending the report failed: {job_status['error']}")
+        else:
+            st.info(f"Report is {job_status['state']}...")
+            st.button("Refresh Status")
 
-# Run Scheduled Jobs in Background
-def run_schedule():
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
-thread = threading.Thread(target=run_schedule, daemon=True)
-thread.start()
+    if report_service is not None and REPORT_RECIPIENTS:
+        st.write("Reports are automatically sent every Monday at 08:00 AM.")
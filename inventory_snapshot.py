@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Local on-disk snapshots of the inventory Google Sheets.
+
+Each sheet is kept as a Parquet file plus a small JSON metadata file. On every
+sync the source is only re-downloaded when it changed (ETag / Last-Modified
+conditional request through sheet_fetcher, or a content hash for local files),
+and only the CSV lines that were added or changed since the last snapshot are
+parsed again. Several sheets can be synced concurrently with `sync_sheets`.
+
+Files are replaced atomically: the Parquet file is named after the content
+digest and the metadata, which names it, is written last, so a reader never
+pairs new rows with old metadata. Syncs of one snapshot are serialized.
+Date columns are parsed with the format inferred for the whole sheet and
+kept in the metadata, so delta rows parse exactly like a full parse would.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from sheet_fetcher import TIMEOUT, download
+
+SNAPSHOT_DIR = os.environ.get("INVENTORY_SNAPSHOT_DIR", ".inventory_cache")
+ROW_HASH = "_row_hash"
+FORMAT_PROBE_LINES = 64  # lines read at a time when looking for the first date
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@dataclass
+class SheetSnapshot:
+    frame: pd.DataFrame    # current rows, in sheet order
+    digest: str            # sha256 of the CSV content the frame was built from
+    added: pd.DataFrame    # rows that were not in the previous snapshot
+    removed: pd.DataFrame  # rows of the previous snapshot that are gone
+    fetched: bool          # False when the stored snapshot was reused as-is
+    previous: str = None   # digest of the snapshot that added/removed are relative to
+
+
+def _snapshot_lock(name, cache_dir):
+    key = os.path.join(os.path.abspath(cache_dir), name)
+    with _locks_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _meta_path(name, cache_dir):
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+def _data_path(name, cache_dir, meta):
+    return os.path.join(cache_dir, meta.get("data", f"{name}.parquet"))
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_meta(meta_path, meta):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    _write_atomic(meta_path, write)
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _fetch(source, meta, timeout):
+    """Return (content, etag, last_modified); content is None when unchanged."""
+    if not source.startswith(("http://", "https://")):
+        path = source[len("file://"):] if source.startswith("file://") else source
+        with open(path, "rb") as f:
+            return f.read(), None, None
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    content, etag, last_modified = download(source, headers=headers, timeout=timeout)
+    if content is None:
+        return None, meta.get("etag"), meta.get("last_modified")
+    return content, etag, last_modified
+
+
+def _first_value(values):
+    values = pd.Series(values, dtype=object).dropna().astype(str).str.strip()
+    values = values[values != ""]
+    return values.iloc[0] if len(values) else None
+
+
+def _date_format(values):
+    """The format pd.to_datetime infers for `values` (from the first non-empty one), or None."""
+    first = _first_value(values)
+    return guess_datetime_format(first) if first is not None else None
+
+
+def _parse_dates(df, parse_dates, formats=None):
+    """Parse the date columns of `df` in place; returns {column: format used}.
+
+    Columns missing from `formats` get the format inferred from their values.
+    """
+    formats = dict(formats or {})
+    for col in parse_dates:
+        if col in df.columns:
+            if col not in formats:
+                formats[col] = _date_format(df[col])
+            df[col] = pd.to_datetime(df[col], format=formats[col], errors="coerce")
+    return formats
+
+
+def _parse(header, lines, parse_dates, formats=None):
+    df = pd.read_csv(StringIO("\n".join([header] + lines)), low_memory=False)
+    return df, _parse_dates(df, parse_dates, formats)
+
+
+def _sheet_formats(header, body, columns):
+    """The date formats a full parse of `body` would infer for `columns`, probing only its first lines."""
+    formats, pending = {}, list(columns)
+    for start in range(0, len(body), FORMAT_PROBE_LINES):
+        if not pending:
+            break
+        probe = pd.read_csv(StringIO("\n".join([header] + body[start:start + FORMAT_PROBE_LINES])),
+                            dtype=str, low_memory=False)
+        for col in list(pending):
+            first = _first_value(probe[col])
+            if first is not None:
+                formats[col] = guess_datetime_format(first)
+                pending.remove(col)
+    return {col: formats.get(col) for col in columns}
+
+
+def _align(old, new):
+    """Cast delta rows to the snapshot's dtypes; None if they are incompatible.
+
+    Delta rows must not change a column's kind, otherwise the merged frame
+    ends up with mixed object columns and a full parse is used instead.
+    """
+    if list(old.columns) != list(new.columns):
+        return None
+    for col in new.columns:
+        a, b = old[col].dtype, new[col].dtype
+        if a == b:
+            continue
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            continue
+        if new[col].isna().all():
+            new[col] = new[col].astype(a)
+            continue
+        return None
+    return new
+
+
+def _unmatched(a, b):
+    """Rows of `a` without a matching row in `b`, counting duplicate rows."""
+    occurrence = a.groupby(ROW_HASH, sort=False).cumcount().to_numpy()
+    available = b[ROW_HASH].value_counts().reindex(a[ROW_HASH]).fillna(0).to_numpy()
+    return a[occurrence >= available]
+
+
+def sync_sheet(source, name, cache_dir=SNAPSHOT_DIR, max_age=60, parse_dates=("DATE",), timeout=TIMEOUT):
+    """Bring the local snapshot `name` up to date with `source` (URL or CSV path).
+
+    Within `max_age` seconds of the last check the stored snapshot is returned
+    without touching the source at all.
+    """
+    with _snapshot_lock(name, cache_dir):
+        return _sync(source, name, cache_dir, max_age, parse_dates, timeout)
+
+
+def _sync(source, name, cache_dir, max_age, parse_dates, timeout):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = _meta_path(name, cache_dir)
+    meta = _read_meta(meta_path)
+    old_path = _data_path(name, cache_dir, meta)
+    try:
+        old = pd.read_parquet(old_path) if meta else None
+    except (OSError, ValueError):
+        # removed or replaced by another process since the metadata was read
+        old, meta = None, {}
+    if old is not None and (meta.get("source") != source or len(old) != meta.get("rows")):
+        old, meta = None, {}
+
+    empty = old.iloc[0:0] if old is not None else pd.DataFrame()
+    if old is not None and time.time() - meta.get("checked_at", 0) < max_age:
+        return SheetSnapshot(old.drop(columns=ROW_HASH), meta["digest"], empty, empty, False, meta["digest"])
+
+    previous = meta.get("digest") if old is not None else None
+    content, etag, last_modified = _fetch(source, meta if old is not None else {}, timeout)
+    digest = hashlib.sha256(content).hexdigest() if content is not None else meta.get("digest")
+    meta.update(source=source, etag=etag, last_modified=last_modified, checked_at=time.time())
+
+    if old is not None and digest == meta.get("digest"):
+        _write_meta(meta_path, meta)
+        return SheetSnapshot(old.drop(columns=ROW_HASH), digest, empty, empty, False, digest)
+
+    text = content.decode("utf-8-sig")
+    lines = text.splitlines()
+    header = lines[0] if lines else ""
+    body = [line for line in lines[1:] if line.strip()]
+    hashes = pd.util.hash_array(np.array(body, dtype=object))
+
+    # Quoted fields spanning several lines cannot be diffed line by line.
+    line_safe = '"' not in text or all(line.count('"') % 2 == 0 for line in body)
+    frame = None
+    formats = meta.get("date_formats")
+    if (old is not None and line_safe and header == meta.get("header") and formats is not None
+            and _sheet_formats(header, body, list(formats)) == formats):
+        known = old.drop_duplicates(ROW_HASH)
+        pos = pd.Index(known[ROW_HASH]).get_indexer(hashes)
+        kept_idx = np.flatnonzero(pos >= 0)
+        new_idx = np.flatnonzero(pos < 0)
+        parsed, _ = _parse(header, [body[i] for i in new_idx], parse_dates, formats)
+        parsed[ROW_HASH] = hashes[new_idx]
+        parsed = _align(known, parsed)
+        if parsed is not None:
+            kept = known.iloc[pos[kept_idx]]
+            frame = pd.concat([kept, parsed], ignore_index=True)
+            order = np.argsort(np.concatenate([kept_idx, new_idx]), kind="stable")
+            frame = frame.iloc[order].reset_index(drop=True)
+
+    if frame is None:
+        if line_safe:
+            frame, formats = _parse(header, body, parse_dates)
+            frame[ROW_HASH] = hashes
+        else:
+            frame = pd.read_csv(StringIO(text), low_memory=False)
+            formats = _parse_dates(frame, parse_dates)
+            frame[ROW_HASH] = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+    if old is not None:
+        added = _unmatched(frame, old)
+        removed = _unmatched(old, frame)
+    else:
+        added, removed = frame, frame.iloc[0:0]
+
+    data_name = f"{name}.{digest[:16]}.parquet"
+    _write_atomic(os.path.join(cache_dir, data_name), lambda path: frame.to_parquet(path, index=False))
+    meta.update(digest=digest, header=header, rows=len(frame), data=data_name, date_formats=formats)
+    _write_meta(meta_path, meta)
+    if os.path.abspath(old_path) != os.path.abspath(os.path.join(cache_dir, data_name)) and os.path.exists(old_path):
+        os.remove(old_path)
+
+    return SheetSnapshot(frame.drop(columns=ROW_HASH), digest,
+                         added.drop(columns=ROW_HASH), removed.drop(columns=ROW_HASH), True, previous)
+
+
+def sync_sheets(sources, **kwargs):
+    """Sync several sheets concurrently; `sources` is {name: source}.
+
+    Returns {name: SheetSnapshot}, keyword arguments go to `sync_sheet`.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(sources))) as pool:
+        futures = {name: pool.submit(sync_sheet, source, name, **kwargs) for name, source in sources.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def load_sheet(source, name, **kwargs):
+    """Return the up-to-date sheet as a DataFrame (see `sync_sheet`)."""
+    return sync_sheet(source, name, **kwargs).frame
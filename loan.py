@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
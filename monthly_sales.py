@@ -8,19 +8,25 @@ Original file is located at
 """
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from chart_render import chart_png
+from excel_ingest import MissingColumnsError
+from sales_analysis import monthly_summary
+from upload_cache import MONTHLY_COLUMNS, read_upload, streamlit_progress
 
 def load_data(uploaded_file):
+    # Only the analysed columns are read; a file without them is rejected before its rows are parsed
+    progress_area = st.empty()
     try:
-        if uploaded_file.name.endswith('.csv'):
-            return pd.read_csv(uploaded_file)
-        else:
-            return pd.read_excel(uploaded_file)
+        return read_upload(uploaded_file.getvalue(), uploaded_file.name, MONTHLY_COLUMNS,
+                           streamlit_progress(progress_area))
+    except MissingColumnsError:
+        st.error("Missing required columns.")
+        return None
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return None
+    finally:
+        progress_area.empty()
 
 def main():
     st.title("Sales Analysis")
@@ -33,20 +39,17 @@ def main():
             st.subheader("First 10 rows of data")
             st.dataframe(data.head(10))
 
-            required_columns = ['DocDate', 'type', 'parName', 'CATEGORY', 'CatCd', 'weight', 'noPcs']
-            if not all(col in data.columns for col in required_columns):
+            try:
+                summary = monthly_summary(data)
+            except MissingColumnsError:
                 st.error("Missing required columns.")
             else:
-                data = data[~data['CATEGORY'].isin(['ST', 'LOOSE PCS', 'PARA BIDS', 'Langadi', 'PROCESS LOSS',
-                                                    'SCRAP PCC', 'BALL CHAIN', 'SIGNING TAR', 'Fine'])]
-
-                party_weight_summary = data.groupby('parName')['weight'].sum().reset_index()
-                party_weight_summary = party_weight_summary.sort_values(by='weight', ascending=False)
+                party_weight_summary = summary.parties[['parName', 'weight']]
 
                 st.subheader("Summary Statistics")
                 st.write(f"Total Parties: {len(party_weight_summary)}")
-                st.write(f"Total Categories: {len(data['CatCd'].unique())}")
-                st.write(f"Total Weight: {round(data['weight'].sum(), 2)}")
+                st.write(f"Total Categories: {len(summary.rows['CatCd'].unique())}")
+                st.write(f"Total Weight: {round(summary.total_weight, 2)}")
 
                 st.subheader("Top 10 Parties by Weight")
                 st.dataframe(party_weight_summary.head(10))
@@ -56,10 +59,8 @@ def main():
 
                 # Visualization
                 st.subheader("Top 10 Parties by Weight - Bar Chart")
-                fig, ax = plt.subplots(figsize=(10, 5))
-                sns.barplot(x='weight', y='parName', data=party_weight_summary.head(10), ax=ax)
-                ax.set_title('Top 10 Parties by Weight')
-                st.pyplot(fig)
+                st.image(chart_png('barplot', party_weight_summary.head(10), x='weight', y='parName',
+                                   title='Top 10 Parties by Weight', figsize=(10, 5)), width='stretch')
 
 if __name__ == "__main__":
     main()
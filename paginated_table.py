@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Server-side paginated and sortable tables for Streamlit.
+
+Only the visible page of a (possibly very large) frame is sent to the
+browser. Sorting happens here, against a sort order cached per result set,
+and the row count and column totals shown above the table still cover the
+whole result set.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+NO_SORT = "(sheet order)"
+
+_orders = OrderedDict()
+_orders_lock = threading.Lock()
+MAX_CACHED_ORDERS = 64
+
+
+def cached_order(key, column, ascending, n_rows):
+    """The cached sort order of the result set `key` by `column`, or None."""
+    if key is None:
+        return None
+    cache_key = (key, column, ascending)
+    with _orders_lock:
+        order = _orders.get(cache_key)
+        if order is None or len(order) != n_rows:
+            return None
+        _orders.move_to_end(cache_key)
+        return order
+
+
+def sort_order(df, column, ascending, key=None):
+    """Row positions of `df` sorted by `column` (missing values last).
+
+    With a `key` identifying the contents of `df`, the order is cached.
+    """
+    order = cached_order(key, column, ascending, len(df))
+    if order is not None:
+        return order
+    cache_key = (key, column, ascending) if key is not None else None
+    values = df[column].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, na_position='last', kind='stable').index.to_numpy()
+    if cache_key is not None:
+        with _orders_lock:
+            _orders[cache_key] = order
+            while len(_orders) > MAX_CACHED_ORDERS:
+                _orders.popitem(last=False)
+    return order
+
+
+def paginated_dataframe(df, name, key=None, totals=("WT",), rows=None, hide=(), **dataframe_kwargs):
+    """Show `df` one page at a time with sort and paging controls.
+
+    `name` makes the widget keys unique on the page; `key` identifies the
+    result set for caching its sort orders (e.g. snapshot version + filters).
+    With `rows` (positions into `df`) only those rows are shown, without
+    copying `df` first. Columns in `hide` are neither shown nor sortable.
+    """
+    def column(c):
+        return df[c] if rows is None else df[c].iloc[rows]
+
+    n_rows = len(df) if rows is None else len(rows)
+    total_cols = [c for c in totals if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+    summary = [f"**{n_rows:,}** rows"] + [f"Total {c}: **{column(c).sum():,.2f}**" for c in total_cols]
+    st.markdown(" · ".join(summary))
+
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    shown = [c for c in df.columns if c not in hide]
+    sort_by = col1.selectbox("Sort by", [NO_SORT] + shown, key=f"{name}_sort")
+    ascending = col2.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{name}_order") == "Ascending"
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{name}_size")
+
+    pages = max(1, -(-n_rows // page_size))
+    page_key = f"{name}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = col4.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    if sort_by == NO_SORT:
+        page_rows = np.arange(start, min(start + page_size, n_rows)) if ascending else \
+            np.arange(n_rows - 1 - start, max(n_rows - 1 - start - page_size, -1), -1)
+    else:
+        # the column of the result set is only gathered when its order is not cached yet
+        order = cached_order(key, sort_by, ascending, n_rows)
+        if order is None:
+            order = sort_order(column(sort_by).to_frame(), sort_by, ascending, key)
+        page_rows = order[start:start + page_size]
+    if rows is not None:
+        page_rows = rows[page_rows]
+    st.dataframe(df.iloc[page_rows][shown] if len(shown) < len(df.columns) else df.iloc[page_rows], **dataframe_kwargs)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Streaming PDF writer for the inventory reports.
+
+Pages are written to the output stream as soon as they are full, so memory
+use is bounded by one page whatever the size of the report. Tables are laid
+out from column arrays (no iterrows) and can be split into several side by
+side panels per page. Only the standard Helvetica fonts are used, so nothing
+is embedded.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+A4 = (595.28, 841.89)  # points
+
+
+def _escape(text):
+    text = str(text).encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').replace('\r', ' ').replace('\n', ' ')
+
+
+def _escape_column(strings, max_chars):
+    s = pd.Series(strings, dtype=object).str.slice(0, max_chars)
+    s = s.str.encode('latin-1', 'replace').str.decode('latin-1')
+    for old, new in (('\\', '\\\\'), ('(', '\\('), (')', '\\)'), ('\r', ' '), ('\n', ' ')):
+        s = s.str.replace(old, new, regex=False)
+    return s.tolist()
+
+
+def format_column(values):
+    """Format one column as a list of strings, vectorized where possible."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'f':
+        out = np.char.mod('%.2f', arr).astype(object)
+        out[np.isnan(arr)] = ''
+        return out.tolist()
+    series = pd.Series(values)
+    return series.astype(object).where(series.notna(), '').astype(str).tolist()
+
+
+class StreamingPDF:
+    def __init__(self, out, font_size=9, margin=36, page_size=A4, compress=True):
+        self.out = out
+        self.font_size = font_size
+        self.margin = margin
+        self.width, self.height = page_size
+        self.compress = compress
+        self.offset = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self.ops = None
+        self.y = None
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    @property
+    def pages(self):
+        return len(self.page_ids)
+
+    def _write(self, data):
+        self.out.write(data)
+        self.offset += len(data)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.offset
+        self._write(b'%d 0 obj\n' % obj_id + body + b'\nendobj\n')
+
+    def _flush_page(self):
+        if self.ops is None:
+            return
+        content = '\n'.join(self.ops).encode('latin-1')
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        if self.compress:
+            content = zlib.compress(content)
+            head = b'<< /Length %d /Filter /FlateDecode >>' % len(content)
+        else:
+            head = b'<< /Length %d >>' % len(content)
+        self._object(content_id, head + b'\nstream\n' + content + b'\nendstream')
+        self._object(page_id, (
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] '
+            '/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (self.width, self.height, content_id)).encode('latin-1'))
+        self.page_ids.append(page_id)
+        self.ops = None
+
+    def add_page(self):
+        self._flush_page()
+        self.ops = []
+        self.y = self.height - self.margin
+
+    def _ensure_space(self, height):
+        if self.ops is None or self.y - height < self.margin:
+            self.add_page()
+
+    def _text(self, x, y, text, size, bold=False):
+        self.ops.append('BT /%s %g Tf %.2f %.2f Td (%s) Tj ET' % ('F2' if bold else 'F1', size, x, y, _escape(text)))
+
+    def line(self, text, size=None, bold=False, align='L'):
+        size = size or self.font_size
+        self._ensure_space(size * 1.5)
+        self.y -= size * 1.5
+        x = self.margin
+        if align == 'C':
+            # Helvetica averages about half an em per character
+            x = max(self.margin, (self.width - len(str(text)) * size * 0.5) / 2)
+        self._text(x, self.y, text, size, bold)
+
+    def heading(self, text, size=12):
+        self.line(text, size=size, bold=True, align='C')
+
+    def table(self, columns, headers, widths=None, panels=1, size=None, chunk=5000):
+        """Lay out `columns` (equal-length array-likes) as a table.
+
+        `widths` are relative column widths; `panels` splits each page into
+        that many side by side copies of the table. Cells are formatted
+        `chunk` rows at a time.
+        """
+        size = size or self.font_size
+        row_height = size * 1.3
+        columns = [col.to_numpy() if hasattr(col, 'to_numpy') else np.asarray(col) for col in columns]
+        n_rows = len(columns[0]) if columns else 0
+        widths = widths or [1] * len(headers)
+        gap = 12
+        panel_width = (self.width - 2 * self.margin - gap * (panels - 1)) / panels
+        scale = panel_width / float(sum(widths))
+        col_x = np.concatenate([[0], np.cumsum(widths)[:-1]]) * scale
+        max_chars = [max(1, int(w * scale / (size * 0.5)) - 1) for w in widths]
+
+        # One text object per row: absolute position of the first cell, then
+        # relative moves to the next columns
+        moves = ''.join(' %.2f 0 Td (%%s) Tj' % (b - a) for a, b in zip(col_x[:-1], col_x[1:]))
+        templates = ['BT /F1 %g Tf %.2f %%.2f Td (%%s) Tj%s ET' % (size, self.margin + p * (panel_width + gap), moves)
+                     for p in range(panels)]
+
+        def start_block():
+            self._ensure_space(row_height * 2)
+            return self.y, int((self.y - self.margin) // row_height) - 1
+
+        top, per_panel = start_block()
+        panel, slot = 0, 0
+        for i in range(n_rows):
+            if i % chunk == 0:
+                rows = list(zip(*[_escape_column(format_column(col[i:i + chunk]), max_chars[j])
+                                  for j, col in enumerate(columns)]))
+            if slot == per_panel:
+                panel, slot = panel + 1, 0
+                if panel == panels:
+                    self.add_page()
+                    top, per_panel = start_block()
+                    panel = 0
+            x0 = self.margin + panel * (panel_width + gap)
+            if slot == 0:
+                for j, header in enumerate(headers):
+                    self._text(x0 + col_x[j], top - row_height, header[:max_chars[j]], size, bold=True)
+            y = top - row_height * (slot + 2)
+            self.ops.append(templates[panel] % ((y,) + rows[i % chunk]))
+            slot += 1
+        if n_rows:
+            self.y = top - row_height * ((per_panel if panel else slot) + 1)
+
+    def close(self):
+        """Finish the document: page tree, catalog, cross-reference table."""
+        if self.ops is None and not self.page_ids:
+            self.add_page()
+        self._flush_page()
+        kids = ' '.join('%d 0 R' % p for p in self.page_ids)
+        self._object(2, ('<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids))).encode('latin-1'))
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        xref_at = self.offset
+        size = self.next_id
+        entries = [b'xref\n0 %d\n' % size, b'0000000000 65535 f \n']
+        for obj_id in range(1, size):
+            entries.append(b'%010d 00000 n \n' % self.offsets[obj_id])
+        self._write(b''.join(entries))
+        self._write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_at))
+
+
+def write_inventory_report(out, sales_df, factory_df, aging, aged_days=10):
+    """Write the stock report (dashboard summary + aged stock) to `out`."""
+    pdf = StreamingPDF(out)
+
+    # Dashboard Data
+    pdf.heading("Dashboard Summary")
+    total_sales_weight = sales_df['WT'].sum()
+    total_factory_weight = factory_df['WT'].sum()
+    overall_weight = total_sales_weight + total_factory_weight
+    pdf.line(f"- Total Sales Weight (WT): {total_sales_weight}")
+    pdf.line(f"- Total Factory Stock Weight (WT): {total_factory_weight}")
+    pdf.line(f"- Overall Inventory Weight (WT): {overall_weight}")
+
+    # Aged Stock Data
+    pdf.heading("Aged Stock Summary")
+    aged_stock = aging.older_than(aged_days)
+    pdf.line(f"- Total Aged Stock Items: {len(aged_stock)}")
+    pdf.line("Aged Stock by Category:")
+    by_category = aging.category_counts(aged_days)
+    pdf.table([by_category['CATEGORY'], by_category['Count']], ["Category", "Count"], panels=3)
+
+    pdf.heading("Full Aged Stock Data")
+    pdf.table([aged_stock['DESIGN NO'], aged_stock['CATEGORY'], aged_stock['WT'], aged_stock['AGE']],
+              ["Design No", "Category", "Weight", "Age (days)"], widths=[3, 2, 2, 2], panels=2)
+    pdf.close()
+    return pdf.pages
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Process-wide report scheduler and e-mail delivery worker.
+
+Streamlit reruns the app script on every interaction, so anything started from
+the script itself is started again and again. This module keeps one
+ReportService per process: one scheduler thread (weekly jobs are registered
+once, by tag) and one delivery thread that builds the report and sends it to
+every recipient over a single reused SMTP connection, with retries and
+backoff. Pages submit jobs and poll their status instead of blocking.
+"""
+
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import schedule
+
+
+class SMTPMailer:
+    """One lazily opened SMTP connection, reused across messages."""
+
+    def __init__(self, host, port, user=None, password=None, starttls=True,
+                 timeout=30, retries=3, backoff=2.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.smtp = None
+
+    def _connection(self):
+        if self.smtp is not None:
+            try:
+                if self.smtp.noop()[0] == 250:
+                    return self.smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password)
+        self.smtp = smtp
+        return smtp
+
+    def send(self, msg):
+        """Send `msg`, reconnecting and backing off on failure."""
+        for attempt in range(self.retries):
+            try:
+                self._connection().send_message(msg)
+                return attempt + 1
+            except (smtplib.SMTPException, OSError):
+                self.close()
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.smtp = None
+
+
+def build_message(sender, receiver, pdf_bytes, subject="Stock Report",
+                  body="Please find the attached stock report.", filename="inventory_report.pdf"):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = receiver
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    attachment = MIMEApplication(pdf_bytes, _subtype='pdf')
+    attachment.add_header('Content-Disposition', 'attachment', filename=filename)
+    msg.attach(attachment)
+    return msg
+
+
+class ReportService:
+    def __init__(self, mailer, sender, poll_interval=30, idle_timeout=60, keep_statuses=100):
+        self.mailer = mailer
+        self.keep_statuses = keep_statuses
+        self.sender = sender
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.scheduler = schedule.Scheduler()
+        self.jobs = queue.Queue()
+        self.statuses = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.RLock()  # scheduled jobs call submit() under it
+        self.stopped = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._run_scheduler, name="report-scheduler", daemon=True),
+            threading.Thread(target=self._run_delivery, name="report-delivery", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, recipients, report_factory):
+        """Queue a report for `recipients`; returns a job id for `status()`.
+
+        `report_factory()` must return the PDF as bytes; it runs on the
+        delivery thread, once per job.
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        job_id = next(self.ids)
+        with self.lock:
+            # Keep the status of the most recent jobs only
+            for old_id in list(self.statuses)[:-self.keep_statuses]:
+                if self.statuses[old_id]['finished_at'] is not None:
+                    del self.statuses[old_id]
+            self.statuses[job_id] = {'state': 'queued', 'recipients': list(recipients),
+                                     'sent': [], 'error': None, 'finished_at': None}
+        self.jobs.put((job_id, list(recipients), report_factory))
+        return job_id
+
+    def status(self, job_id):
+        with self.lock:
+            status = self.statuses.get(job_id)
+            return dict(status, sent=list(status['sent'])) if status else None
+
+    def schedule_weekly(self, tag, day, at, recipients, report_factory):
+        """Register a weekly delivery once per process, however often this is called."""
+        with self.lock:
+            if self.scheduler.get_jobs(tag):
+                return False
+            getattr(self.scheduler.every(), day).at(at).do(
+                self.submit, recipients, report_factory).tag(tag)
+            return True
+
+    def _update(self, job_id, **changes):
+        with self.lock:
+            self.statuses[job_id].update(changes)
+
+    def _run_scheduler(self):
+        while not self.stopped.is_set():
+            with self.lock:
+                self.scheduler.run_pending()
+            self.stopped.wait(self.poll_interval)
+
+    def _run_delivery(self):
+        while not self.stopped.is_set():
+            try:
+                job_id, recipients, report_factory = self.jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # Don't hold the SMTP connection open while there is nothing to send
+                self.mailer.close()
+                continue
+            if job_id is None:
+                break
+            self._update(job_id, state='building')
+            try:
+                pdf_bytes = report_factory()
+                self._update(job_id, state='sending')
+                for receiver in recipients:
+                    self.mailer.send(build_message(self.sender, receiver, pdf_bytes))
+                    with self.lock:
+                        self.statuses[job_id]['sent'].append(receiver)
+                self._update(job_id, state='sent', finished_at=time.time())
+            except Exception as e:
+                self._update(job_id, state='failed', error=str(e), finished_at=time.time())
+        self.mailer.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.jobs.put((None, None, None))
+        for thread in self.threads:
+            thread.join()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_report_service(host, port, sender, user=None, password=None, starttls=True, **kwargs):
+    """Return the process-wide ReportService, starting it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            mailer = SMTPMailer(host, port, user, password, starttls=starttls)
+            _service = ReportService(mailer, sender, **kwargs)
+        return _service
@@ -3,110 +3,186 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from io import StringIO
+from timeseries_chart import time_series_chart
+from chart_render import chart_png
+from excel_ingest import MissingColumnsError
+from sales_analysis import compare_rankings, export_summary, monthly_summary
+from sales_store import KINDS, SalesStore
 
 # Set Streamlit page layout to wide for better dashboard visibility (MOVED TO FIRST COMMAND)
 st.set_page_config(layout="wide")
 
 st.title("Sales Analysis Dashboard")
 
-# File uploader for CSV or Excel files
-uploaded_file = st.file_uploader("Upload a CSV or Excel file", type=["csv", "xlsx"])
+# Uploaded files are merged into a local store partitioned by month (duplicate rows of overlapping exports dropped)
+@st.cache_resource
+def get_sales_store(kind):
+    return SalesStore(kind)
+
+# Rows of a date range and their analysis, per store revision
+@st.cache_resource(max_entries=4)
+def get_sales_range(kind, revision, start, end, _store):
+    data = _store.load(start, end)
+    return data, monthly_summary(data) if kind == "monthly" else export_summary(data)
+
+# Party and category rankings of one stored month: compact aggregates kept for period comparisons,
+# per version of that month's partition (uploads of other months keep them valid)
+@st.cache_resource(max_entries=24)
+def get_month_rankings(kind, month, version, _store):
+    period = pd.Period(month, freq='M')
+    summary = monthly_summary(_store.load(period.start_time.date(), period.end_time.date()))
+    return summary.parties, summary.categories
+
+# File uploader for CSV or Excel files (a new key empties it after files are removed from the store)
+st.session_state.setdefault("uploader_key", 0)
+uploaded_files = st.file_uploader("Upload CSV or Excel files (one or more monthly exports)", type=["csv", "xlsx"],
+                                  accept_multiple_files=True, key=f"uploads-{st.session_state.uploader_key}")
 
 # Dropdown for selecting analysis type
 analysis_type = st.selectbox("Select the type of analysis", ["Monthly Sale", "Export Sale"])
-
-if uploaded_file:
+kind = "monthly" if analysis_type == "Monthly Sale" else "export"
+store = get_sales_store(kind)
+
+if uploaded_files:
+    # New files are parsed in parallel, only the columns the analysis uses
+    progress_area = st.empty()
+    report = store.ingest([(f.name, f.getvalue()) for f in uploaded_files],
+                          lambda done, total: progress_area.progress(done / total, text=f"Parsed {done} of {total} files"))
+    progress_area.empty()
+    for name, result in report.items():
+        if isinstance(result, MissingColumnsError):
+            st.error(f"{name}: the dataset must contain these columns: {KINDS[kind][0]}")
+        elif isinstance(result, Exception):
+            st.error(f"{name}: an error occurred while processing the file: {result}")
+
+# Stored files: a wrong one can be taken out again (its months are rebuilt from the others)
+stored_files = store.files()
+if stored_files:
+    with st.expander(f"Stored files ({len(stored_files)})"):
+        for digest, record in stored_files.items():
+            col1, col2 = st.columns([5, 1])
+            undated = f" ({record['undated']} without a date)" if record.get('undated') else ""
+            col1.write(f"{record['name']}: {record['rows']} rows{undated}, {record['added']} new")
+            if col2.button("Remove", key=f"remove-{digest}"):
+                store.remove(digest)
+                st.session_state.uploader_key += 1
+                st.rerun()
+        if st.button(f"Remove all {analysis_type} data", key="clear-store"):
+            store.clear()
+            st.session_state.uploader_key += 1
+            st.rerun()
+    undated_rows = sum(record.get('undated', 0) for record in stored_files.values())
+    if undated_rows:
+        st.warning(f"{undated_rows} stored rows have no {store.date_column}: they are only counted "
+                   "when the full date range is selected.")
+
+span = store.date_span()
+if span is not None:
     try:
-        # Read uploaded file based on file type
-        if uploaded_file.name.endswith('.csv'):
-            data = pd.read_csv(uploaded_file)
-        else:
-            data = pd.read_excel(uploaded_file)
+        first, last = span[0].date(), span[1].date()
+        date_range = st.date_input("Date range", value=(first, last), min_value=first, max_value=last)
+        start, end = date_range if len(date_range) == 2 else (date_range[0], last)
+        if (start, end) == (first, last):
+            # the full span is no filter: rows without a date are analysed too
+            start = end = None
+        data, summary = get_sales_range(kind, store.revision, start, end, store)
+        range_key = (kind, store.revision, start, end)
 
         if analysis_type == "Monthly Sale":
             st.write("### Monthly Sale Analysis")
             st.write("### First 10 rows of the dataset:")  # FIXED STRING ISSUE
             st.dataframe(data.head(10))
 
-            # Define required columns for analysis
-            required_columns = ['DocDate', 'type', 'parName', 'CATEGORY', 'CatCd', 'weight', 'noPcs']
-            if not all(col in data.columns for col in required_columns):
-                st.error(f"The dataset must contain these columns: {required_columns}")
-            else:
-                # Exclude specific unwanted categories
-                excluded_categories = ['ST', 'LOOSE PCS', 'PARA BIDS', 'Langadi', 'PROCESS LOSS',
-                                       'SCRAP PCC', 'BALL CHAIN', 'SIGNING TAR', 'Fine']
-                df = data[~data['CATEGORY'].isin(excluded_categories)]
-
-                # Aggregate weight data for parties and categories
-                party_weight_summary = df.groupby('parName')['weight'].sum().reset_index()
-                party_weight_summary['Rank'] = party_weight_summary['weight'].rank(
-                    ascending=False, method='min')
-                party_weight_summary = party_weight_summary.sort_values(by='weight', ascending=False)
-
-                CatCd_summary = df.groupby('CatCd')['weight'].sum().reset_index()
-                CatCd_summary['Rank'] = CatCd_summary['weight'].rank(ascending=False, method='min')
-                CatCd_summary = CatCd_summary.sort_values(by='weight', ascending=False)
-
-                # Display KPI metrics
-                st.write("### KPI Metrics")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total Parties", len(party_weight_summary))
-                with col2:
-                    st.metric("Total Categories", len(CatCd_summary))
-                with col3:
-                    st.metric("Total Weight", f"{df['weight'].sum():.2f}")
-
-                # Dropdown to select a party for detailed insights
-                party_name = st.selectbox("Select a party name:", options=party_weight_summary['parName'].unique())
-                if party_name:
-                    party_details = party_weight_summary[party_weight_summary['parName'] == party_name]
-                    st.write(f"**Rank:** {int(party_details['Rank'].values[0])}")
-                    st.write(f"**Party Name:** {party_name}")
-                    st.write(f"**Total Weight:** {party_details['weight'].values[0]:.2f}")
-
-                # Visualization for top and bottom parties
+            # Party and category rankings (excluded categories removed)
+            party_weight_summary = summary.parties
+            CatCd_summary = summary.categories
+
+            # Display KPI metrics
+            st.write("### KPI Metrics")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Parties", len(party_weight_summary))
+            with col2:
+                st.metric("Total Categories", len(CatCd_summary))
+            with col3:
+                st.metric("Total Weight", f"{summary.total_weight:.2f}")
+
+            # Dropdown to select a party for detailed insights
+            party_name = st.selectbox("Select a party name:", options=party_weight_summary['parName'].unique())
+            if party_name:
+                party_details = party_weight_summary[party_weight_summary['parName'] == party_name]
+                st.write(f"**Rank:** {int(party_details['Rank'].values[0])}")
+                st.write(f"**Party Name:** {party_name}")
+                st.write(f"**Total Weight:** {party_details['weight'].values[0]:.2f}")
+
+            # Visualization for top and bottom parties
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("### Top 10 Parties by Weight")
+                st.image(chart_png('barplot', party_weight_summary.head(10), x='weight', y='parName', palette='Blues_r',
+                                   title='Top 10 Parties by Weight'), width='stretch')
+            with col2:
+                st.write("### Bottom 5 Parties by Weight")
+                st.image(chart_png('barplot', party_weight_summary.tail(5), x='weight', y='parName', palette='Reds_r',
+                                   title='Bottom 5 Parties by Weight'), width='stretch')
+
+            # Visualization for top and bottom categories
+            col3, col4 = st.columns(2)
+            with col3:
+                st.write("### Top 10 Categories by Weight")
+                st.image(chart_png('barplot', CatCd_summary.head(10), x='weight', y='CatCd', palette='pastel',
+                                   title='Top 10 Categories by Weight'), width='stretch')
+            with col4:
+                st.write("### Bottom 5 Categories by Weight")
+                st.image(chart_png('barplot', CatCd_summary.tail(5), x='weight', y='CatCd', palette='Oranges_r',
+                                   title='Bottom 5 Categories by Weight'), width='stretch')
+
+            st.write("### Total Weight Over Time")
+            st.plotly_chart(time_series_chart(summary.weight_over_time, 'DocDate', 'weight', title='Total Weight Over Time',
+                                              markers=True, color_discrete_sequence=['blue'],
+                                              key=range_key + ('monthly',)))
+
+            # Movers between two stored months, from their cached rankings
+            months = store.months()
+            if len(months) > 1:
+                st.write("### Period-over-Period Comparison")
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.write("### Top 10 Parties by Weight")
-                    fig1, ax1 = plt.subplots()
-                    sns.barplot(x='weight', y='parName', data=party_weight_summary.head(10), palette='Blues_r', ax=ax1)
-                    ax1.set_title('Top 10 Parties by Weight')
-                    st.pyplot(fig1)
+                    earlier = st.selectbox("Earlier month", months[:-1], index=len(months) - 2)
                 with col2:
-                    st.write("### Bottom 5 Parties by Weight")
-                    fig2, ax2 = plt.subplots()
-                    sns.barplot(x='weight', y='parName', data=party_weight_summary.tail(5), palette='Reds_r', ax=ax2)
-                    ax2.set_title('Bottom 5 Parties by Weight')
-                    st.pyplot(fig2)
-
-                # Visualization for top and bottom categories
-                col3, col4 = st.columns(2)
-                with col3:
-                    st.write("### Top 10 Categories by Weight")
-                    fig3, ax3 = plt.subplots()
-                    sns.barplot(x='weight', y='CatCd', data=CatCd_summary.head(10), palette='pastel', ax=ax3)
-                    ax3.set_title('Top 10 Categories by Weight')
-                    st.pyplot(fig3)
-                with col4:
-                    st.write("### Bottom 5 Categories by Weight")
-                    fig4, ax4 = plt.subplots()
-                    sns.barplot(x='weight', y='CatCd', data=CatCd_summary.tail(5), palette='Oranges_r', ax=ax4)
-                    ax4.set_title('Bottom 5 Categories by Weight')
-                    st.pyplot(fig4)
-
-                # Convert document date column to datetime format for time-based analysis
-                st.write("### Total Weight Over Time")
-                df['DocDate'] = pd.to_datetime(df['DocDate'])
-                time_series = df.groupby('DocDate')['weight'].sum().reset_index()
-                fig5, ax5 = plt.subplots()
-                sns.lineplot(x='DocDate', y='weight', data=time_series, marker='o', color='blue', ax=ax5)
-                ax5.set_title('Total Weight Over Time')
-                st.pyplot(fig5)
+                    # only months after the earlier one: never the same month, never reversed
+                    later_months = [m for m in months if m > earlier]
+                    later = st.selectbox("Later month", later_months, index=len(later_months) - 1)
+                parties_before, categories_before = get_month_rankings(kind, earlier, store.month_version(earlier), store)
+                parties_after, categories_after = get_month_rankings(kind, later, store.month_version(later), store)
+                weight_before, weight_after = parties_before['weight'].sum(), parties_after['weight'].sum()
+                st.metric(f"Total Weight ({later})", f"{weight_after:.2f}", f"{weight_after - weight_before:+.2f}")
+
+                for label, key, before, after in [("Parties", 'parName', parties_before, parties_after),
+                                                  ("Categories", 'CatCd', categories_before, categories_after)]:
+                    comparison = compare_rankings(before, after, key)
+                    st.write(f"#### {label}: {earlier} vs {later}")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(label, len(after), len(after) - len(before))
+                    with col2:
+                        st.metric(f"New {label.lower()}", len(comparison.new))
+                    with col3:
+                        st.metric(f"Lost {label.lower()}", len(comparison.lost))
+                    st.dataframe(comparison.table, hide_index=True)
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write("Top climbers")
+                        st.dataframe(comparison.climbers, hide_index=True)
+                        st.write(f"New {label.lower()}")
+                        st.dataframe(comparison.new, hide_index=True)
+                    with col2:
+                        st.write("Top fallers")
+                        st.dataframe(comparison.fallers, hide_index=True)
+                        st.write(f"Lost {label.lower()}")
+                        st.dataframe(comparison.lost, hide_index=True)
 
         elif analysis_type == "Export Sale":
             st.write("### Export Sale Analysis")
@@ -118,50 +194,40 @@ if uploaded_file:
             col1, col2 = st.columns(2)
             with col1:
                 st.write("#### Statistics for WEIGHT")
-                st.write(data['WEIGHT'].describe())
+                st.write(summary.statistics['WEIGHT'])
             with col2:
                 st.write("#### Statistics for QTY")
-                st.write(data['QTY'].describe())
+                st.write(summary.statistics['QTY'])
 
             # Unique counts for categorical columns
             st.write("### Unique Values in Categorical Columns")
-            st.write(f"Unique Parties: {data['PARTY'].nunique()}")
-            st.write(f"Unique Types: {data['TYPE'].nunique()}")
-            st.write(f"Unique Sizes: {data['SIZE'].nunique()}")
+            st.write(f"Unique Parties: {summary.unique_counts['PARTY']}")
+            st.write(f"Unique Types: {summary.unique_counts['TYPE']}")
+            st.write(f"Unique Sizes: {summary.unique_counts['SIZE']}")
 
             # Time-based Analysis
             st.write("### Weight and Quantity Over Time")
-            data['DATE'] = pd.to_datetime(data['DATE'])
-            time_summary = data.groupby('DATE').agg({'WEIGHT': 'sum', 'QTY': 'sum'}).reset_index()
-            fig1, ax1 = plt.subplots(figsize=(10, 6))
-            sns.lineplot(x='DATE', y='WEIGHT', data=time_summary, marker='o', label='Weight')
-            sns.lineplot(x='DATE', y='QTY', data=time_summary, marker='o', label='Quantity')
-            ax1.set_title("Weight and Quantity Over Time")
-            plt.xlabel("Date")
-            plt.ylabel("Total")
-            plt.legend()
-            st.pyplot(fig1)
+            st.plotly_chart(time_series_chart(summary.over_time, 'DATE', ['WEIGHT', 'QTY'], title="Weight and Quantity Over Time",
+                                              names={'WEIGHT': 'Weight', 'QTY': 'Quantity'}, markers=True,
+                                              labels={'DATE': 'Date', 'value': 'Total', 'variable': ''},
+                                              key=range_key + ('export',)))
 
             # Party-based Analysis
             st.write("### Top and Bottom Parties by Weight")
-            party_summary = data.groupby('PARTY')['WEIGHT'].sum().reset_index()
-            top_10_parties = party_summary.sort_values(by='WEIGHT', ascending=False).head(10)
+            party_summary = summary.parties
+            top_10_parties = party_summary.head(10)
             bottom_5_parties = party_summary.sort_values(by='WEIGHT').head(5)
 
             col1, col2 = st.columns(2)
             with col1:
                 st.write("#### Top 10 Parties")
-                fig2, ax2 = plt.subplots(figsize=(8, 6))
-                sns.barplot(x='WEIGHT', y='PARTY', data=top_10_parties, palette='Blues_r')
-                ax2.set_title("Top 10 Parties by Weight")
-                st.pyplot(fig2)
+                st.image(chart_png('barplot', top_10_parties, x='WEIGHT', y='PARTY', palette='Blues_r',
+                                   title="Top 10 Parties by Weight", figsize=(8, 6)), width='stretch')
             with col2:
                 st.write("#### Bottom 5 Parties")
-                fig3, ax3 = plt.subplots(figsize=(8, 6))
-                sns.barplot(x='WEIGHT', y='PARTY', data=bottom_5_parties, palette='Reds_r')
-                ax3.set_title("Bottom 5 Parties by Weight")
-                st.pyplot(fig3)
+                st.image(chart_png('barplot', bottom_5_parties, x='WEIGHT', y='PARTY', palette='Reds_r',
+                                   title="Bottom 5 Parties by Weight", figsize=(8, 6)), width='stretch')
     except Exception as e:
         st.error(f"An error occurred while processing the file: {e}")
 else:
-    st.info("Please upload an Excel or CSV file to start the analysis.")
+    st.info("Please upload one or more Excel or CSV files to start the analysis.")
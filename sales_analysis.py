@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""The Monthly Sale and Export Sale analyses as plain functions.
+
+Shared by the Streamlit dashboards and the sales_batch command line tool;
+nothing here imports Streamlit or a plotting library.
+"""
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from excel_ingest import MissingColumnsError
+from export_cube import ExportCube
+from upload_cache import EXPORT_COLUMNS, MONTHLY_COLUMNS, monthly_rows
+
+
+def require_columns(df, columns):
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+
+
+def ranking(totals, value):
+    """`totals` with a Rank column (1 = largest `value`), largest first."""
+    totals = totals.copy()
+    totals['Rank'] = totals[value].rank(ascending=False, method='min')
+    return totals.sort_values(by=value, ascending=False)
+
+
+@dataclass
+class MonthlySummary:
+    rows: pd.DataFrame              # rows analysed (excluded categories removed)
+    parties: pd.DataFrame           # parName, weight, Rank
+    categories: pd.DataFrame        # CatCd, weight, Rank
+    weight_over_time: pd.DataFrame  # DocDate, weight
+    total_weight: float
+
+
+def monthly_summary(df):
+    """Monthly Sale analysis of an ERP export (MissingColumnsError without MONTHLY_COLUMNS)."""
+    require_columns(df, MONTHLY_COLUMNS)
+    rows = monthly_rows(df)
+    return MonthlySummary(
+        rows=rows,
+        parties=ranking(rows.groupby('parName')['weight'].sum().reset_index(), 'weight'),
+        categories=ranking(rows.groupby('CatCd')['weight'].sum().reset_index(), 'weight'),
+        weight_over_time=rows.groupby('DocDate')['weight'].sum().reset_index(),
+        total_weight=float(rows['weight'].sum()),
+    )
+
+
+@dataclass
+class ExportSummary:
+    parties: pd.DataFrame      # PARTY, WEIGHT, Rank
+    types: pd.DataFrame        # TYPE, WEIGHT, QTY
+    sizes: pd.DataFrame        # SIZE, WEIGHT
+    designs: pd.DataFrame      # DESIGN NO, WEIGHT, largest first
+    over_time: pd.DataFrame    # DATE, WEIGHT, QTY
+    statistics: pd.DataFrame   # describe() of WEIGHT and QTY
+    unique_counts: dict        # distinct PARTY / TYPE / SIZE values
+
+
+def export_summary(df, cube=None):
+    """Export Sale analysis of an export file, rolled up from its ExportCube."""
+    require_columns(df, EXPORT_COLUMNS)
+    cube = cube if cube is not None else ExportCube(df)
+    return ExportSummary(
+        parties=ranking(cube.rollup('PARTY')[['PARTY', 'WEIGHT']], 'WEIGHT'),
+        types=cube.rollup('TYPE')[['TYPE', 'WEIGHT', 'QTY']],
+        sizes=cube.rollup('SIZE')[['SIZE', 'WEIGHT']],
+        designs=cube.rollup('DESIGN NO')[['DESIGN NO', 'WEIGHT']].sort_values(by='WEIGHT', ascending=False),
+        over_time=cube.rollup('DATE')[['DATE', 'WEIGHT', 'QTY']],
+        statistics=df[['WEIGHT', 'QTY']].describe(),
+        unique_counts={col: int(df[col].nunique()) for col in ('PARTY', 'TYPE', 'SIZE')},
+    )
+
+
+@dataclass
+class RankingComparison:
+    table: pd.DataFrame      # key, {value}_before/_after/_change, pct_change, rank_before/_after/_change
+    new: pd.DataFrame        # rows only in the later period
+    lost: pd.DataFrame       # rows only in the earlier period
+    climbers: pd.DataFrame   # ranked in both periods, most places gained first
+    fallers: pd.DataFrame    # ranked in both periods, most places lost first
+
+
+def compare_rankings(before, after, key, value='weight', top=10):
+    """Period-over-period comparison of two ranking tables (`key`, `value`, Rank, as from ranking()).
+
+    Only the per-period aggregates are merged, never the rows behind them.
+    A rank change is positive when the row moved up; its weight in a period
+    it is missing from counts as 0, and pct_change is NA when there is no
+    earlier weight. `top` limits climbers and fallers.
+    """
+    table = before[[key, value, 'Rank']].merge(after[[key, value, 'Rank']], on=key, how='outer',
+                                               suffixes=('_before', '_after'), indicator=True)
+    table = table.rename(columns={'Rank_before': 'rank_before', 'Rank_after': 'rank_after'})
+    for col in ('rank_before', 'rank_after'):
+        table[col] = table[col].astype('Int64')
+    for col in (f"{value}_before", f"{value}_after"):
+        table[col] = table[col].fillna(0.0)
+    table[f"{value}_change"] = table[f"{value}_after"] - table[f"{value}_before"]
+    earlier = table[f"{value}_before"].where(table[f"{value}_before"] != 0)
+    table['pct_change'] = (table[f"{value}_change"] / earlier * 100).astype('Float64')
+    table['rank_change'] = table['rank_before'] - table['rank_after']
+    table = table.sort_values(by=['rank_after', 'rank_before'], na_position='last', ignore_index=True)
+    status = table.pop('_merge')
+    table = table[[key, f"{value}_before", f"{value}_after", f"{value}_change", 'pct_change',
+                   'rank_before', 'rank_after', 'rank_change']]
+
+    both = table[status == 'both']
+    by_move = both.sort_values(by=['rank_change', f"{value}_change"], ascending=False)
+    return RankingComparison(
+        table=table,
+        new=table[status == 'right_only'].reset_index(drop=True),
+        lost=table[status == 'left_only'].sort_values(by='rank_before', ignore_index=True),
+        climbers=by_move[by_move['rank_change'] > 0].head(top).reset_index(drop=True),
+        fallers=by_move[by_move['rank_change'] < 0].iloc[::-1].head(top).reset_index(drop=True),
+    )
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Headless Monthly Sale / Export Sale analyses over a directory of exports.
+
+Every .csv / .xlsx file in the input directory is analysed in a process pool
+and its ranking tables (CSV), totals (JSON) and, with --charts, the dashboard
+charts (PNG) are written to OUTPUT_DIR/<file name>/. matplotlib and seaborn
+are only imported when charts are requested. Run with:
+python sales_batch.py INPUT_DIR OUTPUT_DIR [--kind auto|monthly|export] [--charts] [--workers N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel_ingest import MissingColumnsError
+from sales_analysis import export_summary, monthly_summary
+from upload_cache import EXPORT_COLUMNS, MONTHLY_COLUMNS, read_upload
+
+ANALYSES = {
+    # kind: (columns read, analysis)
+    "monthly": (MONTHLY_COLUMNS, monthly_summary),
+    "export": (EXPORT_COLUMNS, export_summary),
+}
+EXTENSIONS = ('.csv', '.xlsx')
+
+# seaborn's palette-without-hue deprecation, as in the dashboards
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+
+def analyse_file(path, kind="auto"):
+    """(kind, summary) of one file; "auto" tries the Monthly Sale columns, then Export Sale."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    kinds = list(ANALYSES) if kind == "auto" else [kind]
+    for n, name in enumerate(kinds, 1):
+        columns, analyse = ANALYSES[name]
+        try:
+            data = read_upload(content, os.path.basename(path), columns)
+        except MissingColumnsError:
+            if n == len(kinds):
+                raise
+            continue
+        return name, analyse(data)
+
+
+def write_tables(kind, summary, out_dir):
+    if kind == "monthly":
+        tables = {'party_ranking': summary.parties, 'category_ranking': summary.categories,
+                  'weight_over_time': summary.weight_over_time}
+        totals = {'parties': len(summary.parties), 'categories': len(summary.categories),
+                  'total_weight': summary.total_weight}
+    else:
+        tables = {'party_ranking': summary.parties, 'types': summary.types, 'sizes': summary.sizes,
+                  'designs': summary.designs, 'weight_qty_over_time': summary.over_time,
+                  'statistics': summary.statistics}
+        totals = dict(summary.unique_counts)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(out_dir, f"{name}.csv"), index=name == 'statistics')
+    with open(os.path.join(out_dir, 'totals.json'), 'w') as f:
+        json.dump(totals, f, indent=1)
+
+
+def _line_chart(df, x, columns, title):
+    def draw(ax):
+        for col in columns:
+            ax.plot(df[x], df[col], marker='o', markersize=3, label=col)
+        if len(columns) > 1:
+            ax.legend()
+        ax.set_title(title)
+        ax.tick_params(axis='x', labelrotation=30)
+    return draw
+
+
+def write_charts(kind, summary, out_dir):
+    from chart_render import chart_png, render_png
+
+    if kind == "monthly":
+        parties, categories = summary.parties, summary.categories
+        charts = {
+            'top_parties': chart_png('barplot', parties.head(10), x='weight', y='parName', palette='Blues_r',
+                                     title='Top 10 Parties by Weight'),
+            'bottom_parties': chart_png('barplot', parties.tail(5), x='weight', y='parName', palette='Reds_r',
+                                        title='Bottom 5 Parties by Weight'),
+            'top_categories': chart_png('barplot', categories.head(10), x='weight', y='CatCd', palette='pastel',
+                                        title='Top 10 Categories by Weight'),
+            'bottom_categories': chart_png('barplot', categories.tail(5), x='weight', y='CatCd',
+                                           palette='Oranges_r', title='Bottom 5 Categories by Weight'),
+            'weight_over_time': render_png(_line_chart(summary.weight_over_time, 'DocDate', ['weight'],
+                                                       'Total Weight Over Time'), figsize=(10, 5)),
+        }
+    else:
+        parties = summary.parties
+        charts = {
+            'top_parties': chart_png('barplot', parties.head(10), x='WEIGHT', y='PARTY', palette='Blues_r',
+                                     figsize=(8, 6), title="Top 10 Parties by Weight"),
+            'bottom_parties': chart_png('barplot', parties.sort_values(by='WEIGHT').head(5), x='WEIGHT', y='PARTY',
+                                        palette='Reds_r', figsize=(8, 6), title="Bottom 5 Parties by Weight"),
+            'types': chart_png('barplot', summary.types, x='WEIGHT', y='TYPE', palette='viridis', figsize=(10, 6),
+                               title="Weight by Type"),
+            'sizes': chart_png('barplot', summary.sizes, x='SIZE', y='WEIGHT', palette='coolwarm', figsize=(10, 6),
+                               title="Weight by Size"),
+            'top_designs': chart_png('barplot', summary.designs.head(5), x='WEIGHT', y='DESIGN NO',
+                                     palette='Greens_r', figsize=(8, 6), title="Top 5 Designs by Weight"),
+            'weight_qty_over_time': render_png(_line_chart(summary.over_time, 'DATE', ['WEIGHT', 'QTY'],
+                                                           "Weight and Quantity Over Time"), figsize=(10, 5)),
+        }
+    for name, png in charts.items():
+        with open(os.path.join(out_dir, f"{name}.png"), 'wb') as f:
+            f.write(png)
+
+
+def process_file(path, out_root, kind="auto", charts=False):
+    """Analyse `path` and write its outputs; returns (kind, output directory)."""
+    kind, summary = analyse_file(path, kind)
+    out_dir = os.path.join(out_root, os.path.basename(path))
+    os.makedirs(out_dir, exist_ok=True)
+    write_tables(kind, summary, out_dir)
+    if charts:
+        write_charts(kind, summary, out_dir)
+    return kind, out_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the sales analyses over a directory of exports.")
+    parser.add_argument('input_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--kind', choices=['auto'] + list(ANALYSES), default='auto')
+    parser.add_argument('--charts', action='store_true', help="also write the charts as PNG")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    paths = sorted(os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+                   if name.lower().endswith(EXTENSIONS))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(paths) or 1))) as pool:
+        futures = {pool.submit(process_file, path, args.output_dir, args.kind, args.charts): path for path in paths}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                kind, out_dir = future.result()
+                print(f"{name}: {kind} -> {out_dir}")
+            except Exception as e:
+                failed += 1
+                print(f"{name}: failed: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""Local month-partitioned store of the uploaded sales exports.
+
+Each analysis kind ("monthly" ERP exports keyed by DocDate, "export" sales
+keyed by DATE) has a directory of Parquet files, one per calendar month.
+Uploaded files are parsed in parallel in a process pool (projected to the
+analysed columns) and their rows merged into the month partitions. Rows are
+deduplicated by a hash of their values (document number included, when the
+file has one) as a multiset: a row already stored n times is only added
+again for its occurrences beyond n, so overlapping exports are counted once
+while identical lines within one file are kept. A manifest remembers
+ingested files by content digest, so re-uploading one costs nothing, and
+each file's rows are kept aside so it can be removed again: the months it
+touched are rebuilt from the other files. Rows without a date are kept in
+an "undated" partition, which only a load of the whole store includes (as
+the original analyses counted them). Analyses load any date range, reading
+only the months in it.
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from compact_inventory import STRING_DTYPE
+from upload_cache import EXPORT_COLUMNS, MONTHLY_COLUMNS, content_digest, read_upload
+
+SALES_STORE_DIR = os.environ.get("SALES_STORE_DIR", ".sales_store")
+STORE_VERSION = 3  # bump when the stored rows change
+
+KINDS = {
+    # kind: (analysed columns, date column, document columns stored when the file has them)
+    "monthly": (MONTHLY_COLUMNS, 'DocDate', ['DocNo']),
+    "export": (EXPORT_COLUMNS, 'DATE', []),
+}
+MEASURE_COLUMNS = ('weight', 'noPcs', 'WEIGHT', 'QTY')
+MEASURE_DECIMALS = 6  # CSV and Excel renderings of a value can differ in the last digit
+HASH_COLUMN = '_row_hash'
+UNDATED = 'undated'  # partition of the rows without a date
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process pool for parsing uploads, created on first use and reused."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the Streamlit server has threads, which fork does not copy safely
+            _pool = ProcessPoolExecutor(max_workers=max(1, min(8, (os.cpu_count() or 2) - 1)),
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def document_key(values):
+    """Document numbers as text: 1234 from Excel and 1234.0 from a CSV with blanks are one document."""
+    numbers = pd.to_numeric(values, errors='coerce')
+    whole = numbers.notna() & (numbers % 1 == 0)
+    text = values.astype(STRING_DTYPE).str.strip()
+    return text.mask(whole, numbers[whole].astype('int64').astype(STRING_DTYPE))
+
+
+def normalize(df, columns, date_column, key_columns=()):
+    """`df` with the store's fixed dtypes, so rows of different files hash alike.
+
+    `key_columns` missing from `df` are stored as NA.
+    """
+    out = {}
+    for col in key_columns:
+        out[col] = document_key(df[col]) if col in df.columns else pd.Series(pd.NA, index=df.index, dtype=STRING_DTYPE)
+    for col in columns:
+        if col == date_column:
+            out[col] = pd.to_datetime(df[col], errors='coerce').astype('datetime64[us]')
+        elif col in MEASURE_COLUMNS:
+            out[col] = pd.to_numeric(df[col], errors='coerce').astype('float64').round(MEASURE_DECIMALS)
+        else:
+            out[col] = df[col].astype(STRING_DTYPE)
+    return pd.DataFrame(out, columns=list(columns) + list(key_columns))
+
+
+def parse_file(content, name, kind):
+    """Rows of one uploaded file for `kind`, normalized (runs in a pool worker)."""
+    columns, date_column, key_columns = KINDS[kind]
+    return normalize(read_upload(content, name, columns, optional=key_columns), columns, date_column, key_columns)
+
+
+def new_occurrences(hashes, stored_counts):
+    """Mask of the rows with `hashes` not already covered by `stored_counts` (hash -> count)."""
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    already = pd.Series(hashes).map(stored_counts).fillna(0).to_numpy()
+    return occurrence >= already
+
+
+class SalesStore:
+    def __init__(self, kind, root=SALES_STORE_DIR):
+        self.kind = kind
+        self.columns, self.date_column, self.key_columns = KINDS[kind]
+        self.path = os.path.join(root, f"{kind}.v{STORE_VERSION}")
+        self.lock = threading.Lock()
+        self.manifest = self._read_manifest()
+        self._span = (None, None)  # (revision, date span)
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'revision': 0, 'files': {}, 'month_versions': {}}
+
+    def _write(self, name, write):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _partition(self, month):
+        return os.path.join(self.path, f"{month}.parquet")
+
+    def _source(self, digest):
+        return os.path.join(self.path, 'sources', f"{digest}.parquet")
+
+    def _months_of(self, rows):
+        return rows[self.date_column].dt.strftime('%Y-%m').fillna(UNDATED)
+
+    @property
+    def revision(self):
+        return self.manifest['revision']
+
+    def month_version(self, month):
+        """Revision that last changed the partition `month`, to key results derived from it alone."""
+        return self.manifest.get('month_versions', {}).get(month, self.revision)
+
+    def _changed(self, month):
+        # called before the manifest is written with the next revision
+        self.manifest.setdefault('month_versions', {})[month] = self.revision + 1
+
+    def months(self):
+        """Stored months ('YYYY-MM'), oldest first (the undated partition is not a month)."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-len('.parquet')] for name in os.listdir(self.path)
+                      if name.endswith('.parquet') and name != f"{UNDATED}.parquet")
+
+    def date_span(self):
+        """(first, last) stored date, or None when the store is empty."""
+        revision, span = self._span
+        if revision == self.revision:
+            return span
+        months = self.months()
+        span = None
+        if months:
+            first = pd.read_parquet(self._partition(months[0]), columns=[self.date_column])[self.date_column].min()
+            last = pd.read_parquet(self._partition(months[-1]), columns=[self.date_column])[self.date_column].max()
+            span = (first, last)
+        self._span = (self.revision, span)
+        return span
+
+    def files(self):
+        """Manifest records of the ingested files, by content digest, oldest first."""
+        return dict(self.manifest['files'])
+
+    def _merge(self, rows):
+        """Add the not yet stored occurrences of the hashed `rows`; returns how many rows were added."""
+        added = 0
+        for month, part in rows.groupby(self._months_of(rows), sort=True):
+            path = self._partition(month)
+            stored = pd.read_parquet(path) if os.path.exists(path) else None
+            stored_counts = stored[HASH_COLUMN].value_counts() if stored is not None else pd.Series(dtype='int64')
+            fresh = part[new_occurrences(part[HASH_COLUMN].to_numpy(), stored_counts)]
+            if fresh.empty:
+                continue
+            merged = fresh if stored is None else pd.concat([stored, fresh], ignore_index=True)
+            merged = merged.sort_values(self.date_column, kind='stable', ignore_index=True)
+            self._write(f"{month}.parquet", lambda p: merged.to_parquet(p, index=False))
+            self._changed(month)
+            added += len(fresh)
+        return added
+
+    def ingest(self, files, progress=None):
+        """Parse and store `files` ([(name, content bytes)]) in parallel.
+
+        Returns {name: rows added, or the exception that file raised}. Files
+        already ingested (same content) are skipped and report 0.
+        `progress(files_done, files_total)` is called as files complete.
+        """
+        report, pending = {}, {}
+        for name, content in files:
+            digest = content_digest(content)
+            if digest in self.manifest['files'] or digest in pending:
+                report[name] = 0
+            else:
+                pending[digest] = (name, content)
+        if not pending:
+            return report
+
+        done = []
+        for n, (digest, result) in enumerate(self._parsed(pending), 1):
+            if isinstance(result, Exception):
+                report[pending[digest][0]] = result
+            else:
+                done.append((digest, result))
+            if progress is not None:
+                progress(n, len(pending))
+
+        with self.lock:
+            for digest, frame in done:
+                name = pending[digest][0]
+                rows = frame.assign(**{HASH_COLUMN: pd.util.hash_pandas_object(frame, index=False).to_numpy()})
+                if len(rows):
+                    # the file's own rows, to rebuild its months without it if it is removed
+                    self._write(os.path.join('sources', f"{digest}.parquet"),
+                                lambda p: rows.to_parquet(p, index=False))
+                report[name] = self._merge(rows) if len(rows) else 0
+                self.manifest['files'][digest] = {'name': name, 'rows': len(frame), 'added': report[name],
+                                                  'undated': int(frame[self.date_column].isna().sum()),
+                                                  'months': sorted(self._months_of(rows).unique())}
+            self.manifest['revision'] += 1
+            self._write('manifest.json', self._dump_manifest)
+        return report
+
+    def _rebuild(self, month):
+        """Rewrite partition `month` from the kept rows of the manifest's files, in ingest order."""
+        counts = pd.Series(dtype='int64')
+        kept = []
+        for digest, record in self.manifest['files'].items():
+            if month not in record.get('months', ()):
+                continue
+            rows = pd.read_parquet(self._source(digest))
+            part = rows[(self._months_of(rows) == month).to_numpy()]
+            fresh = part[new_occurrences(part[HASH_COLUMN].to_numpy(), counts)]
+            counts = counts.add(fresh[HASH_COLUMN].value_counts(), fill_value=0).astype('int64')
+            kept.append(fresh)
+        path = self._partition(month)
+        self._changed(month)
+        if not sum(len(part) for part in kept):
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        merged = pd.concat(kept, ignore_index=True).sort_values(self.date_column, kind='stable', ignore_index=True)
+        self._write(f"{month}.parquet", lambda p: merged.to_parquet(p, index=False))
+
+    def remove(self, digest):
+        """Take the file `digest` out of the store; returns False if it is not stored."""
+        with self.lock:
+            record = self.manifest['files'].pop(digest, None)
+            if record is None:
+                return False
+            for month in record.get('months', ()):
+                self._rebuild(month)
+            self.manifest['revision'] += 1
+            self._write('manifest.json', self._dump_manifest)
+            if os.path.exists(self._source(digest)):
+                os.remove(self._source(digest))
+        return True
+
+    def clear(self):
+        """Remove every stored file and month (the revision keeps counting, so no cached result is reused)."""
+        with self.lock:
+            revision = self.manifest['revision'] + 1
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.manifest = {'revision': revision, 'files': {}, 'month_versions': {}}
+            self._write('manifest.json', self._dump_manifest)
+
+    def _dump_manifest(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+
+    def _parse_here(self, digests, pending):
+        for digest in digests:
+            name, content = pending[digest]
+            try:
+                yield digest, parse_file(content, name, self.kind)
+            except Exception as e:
+                yield digest, e
+
+    def _parsed(self, pending):
+        """(digest, frame or the exception raised) for each pending file, as parsed."""
+        if len(pending) == 1:
+            yield from self._parse_here(list(pending), pending)
+            return
+        pool = get_pool()
+        futures = {pool.submit(parse_file, content, name, self.kind): digest
+                   for digest, (name, content) in pending.items()}
+        remaining = set(pending)
+        try:
+            for future in as_completed(futures):
+                digest = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    result = e
+                remaining.discard(digest)
+                yield digest, result
+        except BrokenProcessPool:
+            # a worker died (or could not start): parse the rest in this process
+            _discard_pool(pool)
+            yield from self._parse_here(sorted(remaining), pending)
+
+    def load(self, start=None, end=None):
+        """Stored rows dated from `start` to `end` (inclusive days; None: unbounded).
+
+        With neither bound, the rows without a date are included too.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) + pd.Timedelta(days=1) if end is not None else None
+        months = [m for m in self.months()
+                  if (start is None or m >= start.strftime('%Y-%m')) and (end is None or m <= end.strftime('%Y-%m'))]
+        if start is None and end is None and os.path.exists(self._partition(UNDATED)):
+            months.append(UNDATED)
+        if not months:
+            return normalize(pd.DataFrame(columns=self.columns), self.columns, self.date_column)
+        df = pd.concat([pd.read_parquet(self._partition(m), columns=list(self.columns)) for m in months],
+                       ignore_index=True)
+        dates = df[self.date_column]
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (dates >= start).to_numpy()
+        if end is not None:
+            mask &= (dates < end).to_numpy()
+        return df[mask].reset_index(drop=True)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Trigram inverted index for the inventory search boxes.
+
+Gives the same rows as
+
+    df.astype(str).apply(lambda x: x.str.contains(q, case=False, na=False)).any(axis=1)
+
+but the string conversion is done once per data snapshot, and a query only
+verifies the rows whose trigram posting lists all contain the query's trigrams.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+SEP = "\x00"  # joins the cells of a row so a match cannot span two cells
+REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
+
+def cell_matches(df, query):
+    """The original full-scan filter, used for regex queries and extra columns."""
+    return df.astype(str).apply(lambda x: x.str.contains(query, case=False, na=False)).any(axis=1).to_numpy()
+
+
+class SearchIndex:
+    def __init__(self, df):
+        # the index outlives the page run that built it: a caller adding or
+        # changing columns of `df` later must not change what it returns
+        self.df = df.copy()
+        cells = df.astype(str)
+        # Depending on the pandas version astype(str) keeps missing cells as NaN;
+        # those never match, and neither does an empty cell for a non-empty query.
+        self.any_cell = cells.notna().any(axis=1).to_numpy()
+        if len(df.columns):
+            joined = cells.iloc[:, 0].str.cat([cells[c] for c in cells.columns[1:]], sep=SEP, na_rep="")
+        else:
+            joined = pd.Series([""] * len(df), index=df.index, dtype=object)
+        self.texts = joined.str.lower().to_numpy(dtype=object)
+
+        postings = defaultdict(list)
+        for row, text in enumerate(self.texts):
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                postings[gram].append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def _candidates(self, query):
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        lists = []
+        for gram in grams:
+            if gram not in self.postings:
+                return np.empty(0, dtype=np.int32)
+            lists.append(self.postings[gram])
+        lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def mask(self, query, extra=None):
+        """Boolean array over the indexed rows that match `query`.
+
+        `extra` is an optional frame of additional columns, row-aligned with
+        the indexed frame, that is scanned directly (e.g. a computed AGE).
+        """
+        n = len(self.texts)
+        if not query:
+            result = self.any_cell.copy()
+        elif SEP in query or any(ch in REGEX_CHARS for ch in query):
+            result = cell_matches(self.df, query)
+        else:
+            needle = query.lower()
+            result = np.zeros(n, dtype=bool)
+            if len(needle) < 3:
+                result[:] = [needle in text for text in self.texts]
+            else:
+                rows = self._candidates(needle)
+                hits = [row for row in rows if needle in self.texts[row]]
+                result[hits] = True
+        if extra is not None and len(extra.columns):
+            result |= cell_matches(extra, query)
+        return result
+
+    def search(self, query, extra=None):
+        """Rows of the indexed frame that match `query`."""
+        return self.df[self.mask(query, extra)]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Process-wide inventory cache refreshed in the background.
+
+Readers always get the last loaded value immediately (stale-while-revalidate);
+a daemon thread reloads it every `interval` seconds or when a refresh is
+requested. A failed refresh keeps the previous value and records the error.
+"""
+
+import threading
+import time
+
+
+class SharedInventoryCache:
+    def __init__(self, loader, interval=300):
+        """`loader(stale_ok)` returns the value to cache.
+
+        On a cold start it is called with stale_ok=True, so it may return a
+        locally stored copy instead of waiting on the source; a background
+        refresh follows right away.
+        """
+        self.loader = loader
+        self.interval = interval
+        self.value = None
+        self.version = 0
+        self.synced_at = None
+        self.error = None
+        self.refreshing = False
+        self.lock = threading.Lock()       # guards the value and the flags
+        self.load_lock = threading.Lock()  # one cold load at a time
+        self.wake = threading.Event()
+        self.thread = None
+
+    def _load(self, stale_ok):
+        try:
+            value = self.loader(stale_ok)
+        except Exception as e:
+            with self.lock:
+                self.error = e
+            return False
+        with self.lock:
+            self.value = value
+            self.version += 1
+            self.synced_at = time.time()
+            self.error = None
+        return True
+
+    def _run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            with self.lock:
+                self.refreshing = True
+            try:
+                self._load(stale_ok=False)
+            finally:
+                with self.lock:
+                    self.refreshing = False
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="inventory-refresh", daemon=True)
+                self.thread.start()
+
+    def get(self):
+        """Return (value, version); only the very first call waits for a load."""
+        with self.lock:
+            value, version = self.value, self.version
+        if value is None:
+            # Concurrent first readers wait here and get the value the first one loaded
+            with self.load_lock:
+                with self.lock:
+                    cold = self.value is None
+                loaded = self._load(stale_ok=True) if cold else False
+                with self.lock:
+                    value, version = self.value, self.version
+            if loaded:
+                self.refresh()
+        self._start()
+        return value, version
+
+    def refresh(self):
+        """Ask the background thread to reload now (does not wait)."""
+        with self.lock:
+            self.refreshing = True
+        self._start()
+        self.wake.set()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""HTTP layer for downloading the inventory sheets.
+
+All downloads go through one keep-alive requests.Session with a connection
+pool, connect/read timeouts and retries with backoff on connection errors and
+429/5xx responses. Bodies are streamed in chunks. The sheet export URL is built
+from BASE_URL, which can point at a local HTTP server serving the CSVs for
+tests and benchmarks (env SHEETS_BASE_URL).
+"""
+
+import os
+import threading
+
+BASE_URL = os.environ.get(
+    "SHEETS_BASE_URL",
+    "https://docs.google.com/spreadsheets/d/1Jwx4TntDxlwghFn_eC_NgooXlpvR6WTDdvWy4PO0zgk/export?format=csv&gid=")
+TIMEOUT = (5, 30)  # connect, read (seconds)
+RETRIES = 3
+POOL_SIZE = 8
+CHUNK_SIZE = 1 << 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def sheet_url(gid, base_url=None):
+    """CSV export URL of the sheet tab `gid`."""
+    return (base_url or BASE_URL) + str(gid)
+
+
+def get_session():
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(total=RETRIES, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def download(url, headers=None, timeout=TIMEOUT):
+    """GET `url`; returns (content, etag, last_modified), content None on 304."""
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            return None, None, None
+        response.raise_for_status()
+        content = b"".join(response.iter_content(CHUNK_SIZE))
+        return content, response.headers.get("ETag"), response.headers.get("Last-Modified")
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""classify_designs against the per-value extract_category."""
+
+import io
+import threading
+
+import pandas as pd
+
+import category_engine
+from category_engine import OTHER, classify_designs, extract_category
+
+
+def test_blank_design_is_other():
+    df = pd.read_csv(io.StringIO("DESIGN NO\nSP-1\n\nCM-3\nLN-9\n"), skip_blank_lines=False)
+    assert list(classify_designs(df['DESIGN NO'])) == ['SP', OTHER, 'CM', 'LN']
+
+
+def test_missing_values_are_other():
+    values = pd.Series(["SP-1", None, float("nan"), "CM-3", pd.NA], dtype=object)
+    assert list(classify_designs(values)) == ['SP', OTHER, OTHER, 'CM', OTHER]
+
+
+def test_longer_code_wins():
+    values = ["SPE-12", "SP-12", "XSPE", "sp-1", "12"]
+    result = list(classify_designs(values))
+    assert result == ['SPE', 'SP', 'SPE', OTHER, OTHER]
+    assert result == [extract_category(v) for v in values]
+
+
+def test_matches_extract_category_after_memo_reset(monkeypatch):
+    monkeypatch.setattr(category_engine, 'MEMO_LIMIT', 3)
+    category_engine._memo.clear()
+    first = ["CM-1", "SPE-2", "LN-3"]
+    second = ["GL-4", "CM-1", "FR-5", "SP-6"]
+    assert list(classify_designs(first)) == [extract_category(v) for v in first]
+    assert list(classify_designs(second)) == [extract_category(v) for v in second]
+
+
+def test_concurrent_calls_with_memo_resets(monkeypatch):
+    monkeypatch.setattr(category_engine, 'MEMO_LIMIT', 50)
+    errors = []
+
+    def work(seed):
+        values = [f"{code}-{seed}-{n}" for n in range(40) for code in ("SP", "SPE", "CM", "ZZ")]
+        expected = [extract_category(v) for v in values]
+        try:
+            for _ in range(50):
+                assert list(classify_designs(values)) == expected
+        except Exception as e:  # noqa: BLE001 - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""sync_sheet delta merges against a full parse of a local CSV stand-in for the sheet."""
+
+import os
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+import inventory_snapshot
+from inventory_snapshot import sync_sheet
+
+# the sheet's day-first dates, inferred like pd.to_datetime does
+pytestmark = pytest.mark.filterwarnings("ignore:Parsing dates in:UserWarning")
+
+HEADER = "DATE,DESIGN NO,WT,DELIVERED"
+ROWS = [
+    "13/02/2024,SP-1,1.5,in",
+    "14/02/2024,CM-2,2.25,out",
+    "15/02/2024,LN-3,3.0,in",
+    "15/02/2024,LN-3,3.0,in",  # the same line twice: two rows
+    ",GL-4,4.0,in",
+]
+
+
+def write_sheet(path, rows, header=HEADER):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        f.write("\n".join([header] + rows) + "\n")
+    os.replace(tmp_path, path)
+
+
+def full_parse(path):
+    df = pd.read_csv(path, low_memory=False)
+    df["DATE"] = pd.to_datetime(df["DATE"], errors="coerce")
+    return df
+
+
+def full_parse_rows(rows, positions, header=HEADER):
+    """Full parse of the sheet `rows`, keeping the rows at `positions`."""
+    df = pd.read_csv(StringIO("\n".join([header] + rows)))
+    df["DATE"] = pd.to_datetime(df["DATE"], format="%d/%m/%Y", errors="coerce")
+    return df.iloc[positions]
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    path = str(tmp_path / "sheet.csv")
+    cache_dir = str(tmp_path / "cache")
+
+    def sync(rows=None, **kwargs):
+        if rows is not None:
+            write_sheet(path, rows, **kwargs)
+        snapshot = sync_sheet(path, "inventory", cache_dir=cache_dir, max_age=0)
+        pd.testing.assert_frame_equal(snapshot.frame, full_parse(path))
+        return snapshot
+
+    sync.cache_dir = cache_dir
+    return sync
+
+
+@pytest.fixture
+def parsed_lines(monkeypatch):
+    """Number of body lines given to each CSV parse of a sync."""
+    calls = []
+    parse = inventory_snapshot._parse
+
+    def counting(header, lines, *args, **kwargs):
+        calls.append(len(lines))
+        return parse(header, lines, *args, **kwargs)
+
+    monkeypatch.setattr(inventory_snapshot, "_parse", counting)
+    return calls
+
+
+def records(df):
+    return sorted(df.astype(str).itertuples(index=False, name=None))
+
+
+def test_initial_load(sheet):
+    snapshot = sheet(ROWS)
+    assert snapshot.fetched and snapshot.previous is None
+    assert len(snapshot.added) == len(ROWS) and snapshot.removed.empty
+    assert snapshot.frame["DATE"].iloc[0] == pd.Timestamp("2024-02-13")
+
+
+def test_unchanged_sheet_is_reused(sheet):
+    first = sheet(ROWS)
+    again = sheet()
+    assert not again.fetched and again.digest == first.digest
+    assert again.added.empty and again.removed.empty
+
+
+def test_appended_changed_and_removed_lines(sheet, parsed_lines):
+    first = sheet(ROWS)
+    rows = [ROWS[0], "14/02/2024,CM-2,2.5,out", ROWS[2], ROWS[4], "01/03/2024,SP-5,5.0,in"]
+    parsed_lines.clear()
+    snapshot = sheet(rows)
+
+    # only the changed and the appended line were parsed
+    assert parsed_lines == [2]
+    assert snapshot.previous == first.digest
+    assert records(snapshot.added) == records(full_parse_rows(rows, [1, 4]))
+    # one of the two identical LN-3 rows is gone, and the old CM-2 line
+    assert records(snapshot.removed) == records(full_parse_rows(ROWS, [1, 3]))
+    # delta rows use the sheet's day-first format: 1 March, not 3 January
+    assert snapshot.frame["DATE"].iloc[-1] == pd.Timestamp("2024-03-01")
+
+
+def test_dtype_change_forces_a_full_parse(sheet, parsed_lines):
+    sheet(ROWS)
+    parsed_lines.clear()
+    snapshot = sheet(ROWS + ["16/02/2024,SP-6,about 6,in"])
+    assert parsed_lines[-1] == len(ROWS) + 1
+    assert not pd.api.types.is_numeric_dtype(snapshot.frame["WT"])
+
+
+def test_date_format_change_forces_a_full_parse(sheet, parsed_lines):
+    sheet(ROWS)
+    rows = ["02/13/2024,SP-1,1.5,in"] + ROWS[1:] + ["03/01/2024,SP-5,5.0,in"]
+    parsed_lines.clear()
+    snapshot = sheet(rows)
+    assert parsed_lines[-1] == len(rows)
+    assert snapshot.frame["DATE"].iloc[0] == pd.Timestamp("2024-02-13")
+
+
+def test_header_change_forces_a_full_parse(sheet):
+    sheet(ROWS)
+    snapshot = sheet([row + ",x" for row in ROWS], header=HEADER + ",NOTE")
+    assert list(snapshot.frame.columns) == HEADER.split(",") + ["NOTE"]
+
+
+def test_quoted_multiline_fields(sheet):
+    rows = ROWS + ['16/02/2024,"SP-7\nsecond line",1.0,in']
+    sheet(rows)
+    snapshot = sheet(rows + ["17/02/2024,SP-8,2.0,in"])
+    assert len(snapshot.added) == 1 and snapshot.removed.empty
+
+
+def test_only_the_current_snapshot_is_kept(sheet):
+    sheet(ROWS)
+    sheet(ROWS + ["16/02/2024,SP-6,6.0,in"])
+    snapshot = sheet(ROWS[:2])
+    assert set(os.listdir(sheet.cache_dir)) == {"inventory.json", f"inventory.{snapshot.digest[:16]}.parquet"}
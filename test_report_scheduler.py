@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""ReportService / SMTPMailer against a local aiosmtpd SMTP stand-in."""
+
+import email
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from report_scheduler import ReportService, SMTPMailer  # noqa: E402
+
+PDF = b"%PDF-1.4 test report"
+
+
+class Inbox:
+    """aiosmtpd handler keeping the delivered messages; rejects the first `fail` deliveries."""
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.attempts = 0
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts += 1
+        if self.attempts <= self.fail:
+            return "451 Temporary failure, try again"
+        self.messages.append((envelope.rcpt_tos, email.message_from_bytes(envelope.content)))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    controllers = []
+
+    def start(inbox):
+        controller = Controller(inbox, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        controllers.append(controller)
+        return controller.hostname, controller.port
+
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(host, port, retries=3):
+        mailer = SMTPMailer(host, port, starttls=False, timeout=5, retries=retries, backoff=0.01)
+        service = ReportService(mailer, "reports@example.com", poll_interval=0.05, idle_timeout=0.2)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.stop()
+
+
+def wait_finished(service, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = service.status(job_id)
+        if status['finished_at'] is not None:
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish: {service.status(job_id)}")
+
+
+def test_report_is_delivered_to_every_recipient(smtp_server, make_service):
+    inbox = Inbox()
+    service = make_service(*smtp_server(inbox))
+    job_id = service.submit(["a@example.com", "b@example.com"], lambda: PDF)
+
+    status = wait_finished(service, job_id)
+    assert status['state'] == 'sent'
+    assert status['sent'] == ["a@example.com", "b@example.com"]
+    assert [rcpt for rcpt, _ in inbox.messages] == [["a@example.com"], ["b@example.com"]]
+    _, msg = inbox.messages[0]
+    assert msg['From'] == "reports@example.com"
+    attachment = [part for part in msg.walk() if part.get_filename() == "inventory_report.pdf"]
+    assert attachment[0].get_payload(decode=True) == PDF
+
+
+def test_temporary_failures_are_retried(smtp_server, make_service):
+    inbox = Inbox(fail=2)
+    service = make_service(*smtp_server(inbox), retries=3)
+    status = wait_finished(service, service.submit("a@example.com", lambda: PDF))
+
+    assert status['state'] == 'sent'
+    assert inbox.attempts == 3
+    assert len(inbox.messages) == 1
+
+
+def test_job_fails_once_retries_are_exhausted(smtp_server, make_service):
+    inbox = Inbox(fail=5)
+    service = make_service(*smtp_server(inbox), retries=2)
+    status = wait_finished(service, service.submit("a@example.com", lambda: PDF))
+
+    assert status['state'] == 'failed'
+    assert "451" in status['error']
+    assert inbox.attempts == 2 and not inbox.messages
+
+
+def test_weekly_job_is_registered_once_per_tag(smtp_server, make_service):
+    service = make_service(*smtp_server(Inbox()))
+    assert service.schedule_weekly("weekly", "monday", "08:00", ["a@example.com"], lambda: PDF)
+    assert not service.schedule_weekly("weekly", "monday", "08:00", ["a@example.com"], lambda: PDF)
+    assert service.schedule_weekly("other", "friday", "17:00", ["a@example.com"], lambda: PDF)
+    assert len(service.scheduler.get_jobs("weekly")) == 1
+    assert len(service.scheduler.jobs) == 2
+
+
+def test_scheduled_job_submits_a_delivery(smtp_server, make_service):
+    inbox = Inbox()
+    service = make_service(*smtp_server(inbox))
+    service.schedule_weekly("weekly", "monday", "08:00", ["a@example.com"], lambda: PDF)
+    with service.lock:
+        service.scheduler.run_all()
+
+    deadline = time.time() + 10
+    while not inbox.messages and time.time() < deadline:
+        time.sleep(0.02)
+    assert [rcpt for rcpt, _ in inbox.messages] == [["a@example.com"]]
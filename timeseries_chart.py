@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Time-series line charts that stay small however long the history gets.
+
+A series is reduced to a fixed point budget (about two points per horizontal
+pixel) with min/max bucketing, which keeps every peak and trough, and long
+series are drawn with WebGL traces. Downsampled series are cached by a key
+identifying the data (e.g. the snapshot version).
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 1500    # two points per pixel of a full-width chart
+WEBGL_POINTS = 1000  # draw with WebGL above this many points
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+MAX_CACHED_SERIES = 64
+
+
+def minmax_positions(y, max_points=MAX_POINTS):
+    """Positions of `y` to plot: first, last, and the min and max of each bucket."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, (max_points - 2) // 2)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))  # by bucket, then value
+    bounds = np.searchsorted(bucket, np.arange(buckets + 1))
+    keep = np.concatenate([[0, n - 1], order[bounds[:-1]], order[bounds[1:] - 1]])
+    return np.unique(keep)
+
+
+def downsample(df, x, y, max_points=MAX_POINTS, key=None):
+    """Rows of `df` (x, y columns, sorted by x) reduced to about `max_points`."""
+    cache_key = (key, x, y, max_points, len(df)) if key is not None else None
+    if cache_key is not None:
+        with _cache_lock:
+            if cache_key in _cache:
+                _cache.move_to_end(cache_key)
+                return _cache[cache_key]
+
+    series = df[[x, y]].dropna()
+    if not series[x].is_monotonic_increasing:
+        series = series.sort_values(x, kind='stable')
+    series = series.iloc[minmax_positions(series[y].to_numpy(), max_points)].reset_index(drop=True)
+
+    if cache_key is not None:
+        with _cache_lock:
+            _cache[cache_key] = series
+            while len(_cache) > MAX_CACHED_SERIES:
+                _cache.popitem(last=False)
+    return series
+
+
+def time_series_chart(df, x, y, title=None, names=None, max_points=MAX_POINTS, key=None, **line_kwargs):
+    """Plotly line chart of one column `y`, or several (a list, one trace each).
+
+    `names` maps column names to legend labels for several columns.
+    """
+    import plotly.express as px
+
+    if isinstance(y, str):
+        data = downsample(df, x, y, max_points, key)
+        return px.line(data, x=x, y=y, title=title,
+                       render_mode='webgl' if len(data) > WEBGL_POINTS else 'svg', **line_kwargs)
+
+    names = names or {}
+    parts = [downsample(df, x, col, max_points, key).rename(columns={col: 'value'}).assign(variable=names.get(col, col))
+             for col in y]
+    data = pd.concat(parts, ignore_index=True)
+    points = max(len(part) for part in parts)
+    line_kwargs.setdefault('labels', {'value': 'Total', 'variable': ''})
+    return px.line(data, x=x, y='value', color='variable', title=title,
+                   render_mode='webgl' if points > WEBGL_POINTS else 'svg', **line_kwargs)
@@ -9,47 +9,121 @@ https://colab.research.google.com/drive/1aHPwHTOHyDChtT8tTnmoHPKD_f39w-iK
 """
 # -*- coding: utf-8 -*-
 # -*- coding: utf-8 -*-
+import os
+import tempfile
+from datetime import datetime
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-
-# Google Sheets Information
-GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1Jwx4TntDxlwghFn_eC_NgooXlpvR6WTDdvWy4PO0zgk/export?format=csv&gid="
-
+from paginated_table import paginated_dataframe
+from design_index import DesignIndex
+from timeseries_chart import time_series_chart
+from compact_inventory import SOURCE_COLUMN, combine_sources
+from inventory_snapshot import sync_sheets
+from sheet_fetcher import sheet_url
+from shared_inventory_cache import SharedInventoryCache
+
+# Google Sheets Information (SHEETS_BASE_URL points this at another server)
 SHEET_IDS = {
     "salesperson_inventory": "2076018430",  # GID for salesperson inventory
     "factory_inventory": "0"  # GID for factory inventory
 }
 
-# Function to Load Data from Google Sheets
-@st.cache_data
-def load_data(sheet_gid):
-    try:
-        url = GOOGLE_SHEET_URL + sheet_gid
-        df = pd.read_csv(url)
-        df.dropna(how='all', inplace=True)  # Remove empty rows
-        
-        if 'DATE' in df.columns:
-            df['DATE'] = pd.to_datetime(df['DATE'], errors='coerce')  # Ensure DATE is datetime
-        
-        if 'DESIGN NO' in df.columns:
-            df['Category'] = df['DESIGN NO'].apply(lambda x: x.split('-')[0] if pd.notna(x) else 'Unknown')
-        else:
-            df['Category'] = 'Unknown'
-        
-        return df
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+# Seconds between background refreshes of the sheets
+REFRESH_INTERVAL = float(os.environ.get("INVENTORY_REFRESH_SECONDS", "300"))
 
-# Load data
-salesperson_inventory = load_data(SHEET_IDS['salesperson_inventory'])
-factory_inventory = load_data(SHEET_IDS['factory_inventory'])
+# Function to clean a sheet loaded from Google Sheets
+def prepare_data(df):
+    df = df.dropna(how='all')  # Remove empty rows
+
+    if 'DESIGN NO' in df.columns:
+        df['Category'] = df['DESIGN NO'].apply(lambda x: x.split('-')[0] if pd.notna(x) else 'Unknown')
+    else:
+        df['Category'] = 'Unknown'
+
+    return df
+
+# One compact frame of both sheets with a SOURCE column; the per-sheet frames are slices of it.
+# Both sheets are fetched concurrently; with stale_ok the local snapshots will do.
+def load_inventory(stale_ok=False):
+    snapshots = sync_sheets({name: sheet_url(gid) for name, gid in SHEET_IDS.items()},
+                            max_age=float('inf') if stale_ok else 0)
+    return combine_sources({
+        "Salesperson": prepare_data(snapshots['salesperson_inventory'].frame),
+        "Factory": prepare_data(snapshots['factory_inventory'].frame),
+    })
+
+# Shared by all sessions; refreshed in the background so no rerun waits on Google Sheets
+@st.cache_resource
+def get_inventory_cache():
+    return SharedInventoryCache(load_inventory, REFRESH_INTERVAL)
+
+inventory_cache = get_inventory_cache()
+
+# Load data: (overall, {"Salesperson": ..., "Factory": ...}, version), called by the pages that
+# show it, so Home renders without waiting on the first sheet download
+def load_data():
+    inventory, version = inventory_cache.get()
+    if inventory is None:
+        st.error(f"Error loading data: {inventory_cache.error}")
+        inventory = combine_sources({"Salesperson": pd.DataFrame(), "Factory": pd.DataFrame()})
+    return inventory[0], inventory[1], version
+
+# Items older than `days` days
+def aged_items(df, days):
+    if 'DATE' not in df.columns:
+        return df.iloc[0:0]
+    return df[pd.Timestamp.today() - df['DATE'] > pd.Timedelta(days=days)]
+
+# Excel stock report (constant memory), built once per snapshot, threshold and day
+@st.cache_resource(max_entries=2)
+def get_excel_report(version, aged_days, today, _overall, _sources):
+    from excel_report import write_inventory_workbook
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as out:
+        write_inventory_workbook(out, _sources["Salesperson"], _sources["Factory"], _overall,
+                                 aged_items(_overall, aged_days))
+        out.seek(0)
+        return out.read()
+
+# DESIGN NO / Category lookups for one inventory page, built once per snapshot
+@st.cache_resource(max_entries=3)
+def get_design_index(version, title, _inventory_data):
+    return DesignIndex(_inventory_data)
+
+# Function to render inventory pages
+def render_inventory_page(title, inventory_data, version=None):
+    st.title(title)
+    if inventory_data.empty:
+        st.warning("No data available.")
+        return
+    
+    index = get_design_index(version, title, inventory_data)
+    st.subheader("🔍 Search & Filter")
+    col1, col2 = st.columns([3, 1])
+    search_term = col1.text_input("Search by Design No", "").strip()
+    match = col2.radio("Match", ["Contains", "Starts with"], horizontal=True)
+    category_filter = st.selectbox("Filter by Category", ['All'] + index.categories)
+    
+    # Positions of the matching rows; the frame itself is never copied
+    rows = index.select(search_term, None if category_filter == 'All' else category_filter,
+                        prefix=match == "Starts with")
+    paginated_dataframe(inventory_data, "inventory", key=(version, title, category_filter, match, search_term),
+                        totals=("PCS", "WT"), rows=rows, hide=(SOURCE_COLUMN,), use_container_width=True)
 
 # Sidebar Navigation
 st.sidebar.title("📦 Inventory Management")
 page = st.sidebar.radio("Navigation", ["Home", "Dashboard", "Salesperson Inventory", "Factory Inventory", "Overall Inventory", "Aged Stock"]).strip()
 
+# Data freshness and manual refresh
+if inventory_cache.synced_at:
+    st.sidebar.caption(f"🕒 Last synced: {datetime.fromtimestamp(inventory_cache.synced_at):%Y-%m-%d %H:%M:%S}")
+if st.sidebar.button("🔄 Refresh data"):
+    inventory_cache.refresh()
+if inventory_cache.refreshing:
+    st.sidebar.caption("Refreshing in the background…")
+elif inventory_cache.error and inventory_cache.value is not None:
+    st.sidebar.warning(f"Last refresh failed, showing the previous data: {inventory_cache.error}")
+
 # Home Page
 if page == "Home":
     st.title("🏠 Welcome to the Inventory Management App")
@@ -65,8 +139,9 @@ if page == "Home":
 elif page == "Dashboard":
     st.title("📈 Stock Inventory Dashboard")
 
-    df_sales = load_data(SHEET_IDS["salesperson_inventory"])
-    df_factory = load_data(SHEET_IDS["factory_inventory"])
+    overall_inventory, inventory_sources, sync_version = load_data()
+    df_sales = inventory_sources["Salesperson"]
+    df_factory = inventory_sources["Factory"]
 
     if not df_sales.empty and not df_factory.empty:
         # Overall Inventory Statistics
@@ -97,9 +172,9 @@ elif page == "Dashboard":
 
         # New Bar Chart: Overall Inventory Categories by Weight
         st.subheader("📊 Overall Inventory Categories by Weight")
-        combined_df = pd.concat([df_sales, df_factory], ignore_index=True)
+        combined_df = overall_inventory
         if "Category" in combined_df.columns and "WT" in combined_df.columns:
-            category_wt = combined_df.groupby("Category")["WT"].sum().sort_values(ascending=False)
+            category_wt = combined_df.groupby("Category", observed=True)["WT"].sum().sort_values(ascending=False)
             st.bar_chart(category_wt)
         else:
             st.warning("Category or WT column missing in data.")
@@ -107,58 +182,49 @@ elif page == "Dashboard":
         # Visualization: Stock Distribution Over Time
         st.subheader("📅 Stock Distribution Over Time")
         if "DATE" in combined_df.columns and "PCS" in combined_df.columns:
-            stock_over_time = combined_df.groupby(combined_df["DATE"].dt.date)["PCS"].sum()
-            st.line_chart(stock_over_time)
+            stock_over_time = combined_df.groupby(combined_df["DATE"].dt.normalize())["PCS"].sum().reset_index()
+            st.plotly_chart(time_series_chart(stock_over_time, "DATE", "PCS", key=("stock_over_time", sync_version)),
+                            use_container_width=True)
         else:
             st.warning("DATE or PCS column missing in data.")
     else:
         st.warning("⚠️ No data available! Please check your Google Sheet link.")
 
-# Function to render inventory pages
-def render_inventory_page(title, inventory_data):
-    st.title(title)
-    if inventory_data.empty:
-        st.warning("No data available.")
-        return
-    
-    st.subheader("🔍 Search & Filter")
-    search_term = st.text_input("Search by Design No", "").strip()
-    categories = inventory_data['Category'].dropna().unique() if 'Category' in inventory_data.columns else []
-    category_filter = st.selectbox("Filter by Category", ['All'] + list(categories))
-    
-    filtered_data = inventory_data.copy()
-    if category_filter != 'All' and 'Category' in filtered_data.columns:
-        filtered_data = filtered_data[filtered_data['Category'] == category_filter]
-    if search_term and 'DESIGN NO' in filtered_data.columns:
-        filtered_data = filtered_data[filtered_data['DESIGN NO'].astype(str).str.contains(search_term, case=False, na=False)]
-    
-    st.dataframe(filtered_data, use_container_width=True)
-
-# Ensure `elif` statements are correctly placed
 elif page == "Salesperson Inventory":
-    render_inventory_page("👨‍💼 Salesperson Inventory", salesperson_inventory)
+    _, inventory_sources, sync_version = load_data()
+    render_inventory_page("👨‍💼 Salesperson Inventory", inventory_sources["Salesperson"], sync_version)
 
 elif page == "Factory Inventory":
-    render_inventory_page("🏭 Factory Inventory", factory_inventory)
+    _, inventory_sources, sync_version = load_data()
+    render_inventory_page("🏭 Factory Inventory", inventory_sources["Factory"], sync_version)
 
 elif page == "Overall Inventory":
-    overall_inventory = pd.concat([salesperson_inventory, factory_inventory], ignore_index=True)
-    render_inventory_page("📦 Overall Inventory", overall_inventory)
+    overall_inventory, _, sync_version = load_data()
+    render_inventory_page("📦 Overall Inventory", overall_inventory, sync_version)
 
 elif page == "Aged Stock":
     st.title("📅 Aged Stock")
-    overall_inventory = pd.concat([salesperson_inventory, factory_inventory], ignore_index=True)
+    overall_inventory, _, sync_version = load_data()
     if 'DATE' in overall_inventory.columns:
         days_threshold = st.slider("Select Aging Threshold (Days)", min_value=15, max_value=90, value=30, step=5)
-        aged_stock = overall_inventory[pd.Timestamp.today() - overall_inventory['DATE'] > pd.Timedelta(days=days_threshold)]
-        st.dataframe(aged_stock, use_container_width=True)
+        aged_stock = aged_items(overall_inventory, days_threshold)
+        paginated_dataframe(aged_stock, "aged_stock", key=(sync_version, days_threshold, pd.Timestamp.today().date()), totals=("PCS", "WT"),
+                            hide=(SOURCE_COLUMN,), use_container_width=True)
     else:
         st.warning("Date information not available.")
 
-# PDF & Excel Reports (Placeholder)
+# PDF & Excel Reports (PDF is a placeholder)
 st.sidebar.subheader("📑 Generate Reports")
 report_type = st.sidebar.radio("Select Report Type", ["None", "PDF", "Excel"])
 if report_type == "PDF":
     st.sidebar.write("🚀 PDF Report Generation Coming Soon!")
 elif report_type == "Excel":
-    st.sidebar.write("🚀 Excel Report Generation Coming Soon!")
+    report_days = st.sidebar.slider("Aged stock threshold (days)", min_value=15, max_value=90, value=30, step=5,
+                                    key="report_aged_days")
+    if st.sidebar.button("Generate Excel Report"):
+        with st.spinner("Generating Excel report..."):
+            overall_inventory, inventory_sources, sync_version = load_data()
+            excel_report = get_excel_report(sync_version, report_days, pd.Timestamp.today().date(),
+                                            overall_inventory, inventory_sources)
+        st.sidebar.download_button("Download Excel Report", data=excel_report, file_name="inventory_report.xlsx",
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
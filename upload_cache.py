@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Parse cache for the sales dashboard uploads.
+
+An uploaded file is identified by the sha256 of its content. It is parsed
+once, reading only the columns an analysis needs (see excel_ingest), into a
+typed frame (Arrow strings, downcast integers, DocDate / DATE as datetimes),
+which is also written to a local Parquet cache so the same file uploaded
+again, even after a restart, is not parsed a second time. The Monthly Sale
+rows (excluded categories removed) are derived once per load.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+from compact_inventory import compact_frame
+from excel_ingest import MissingColumnsError, apply_dtypes, read_csv_projected, read_excel_projected
+
+UPLOAD_CACHE_DIR = os.environ.get("UPLOAD_CACHE_DIR", ".upload_cache")
+CACHE_VERSION = 2  # bump when the prepared frame changes
+MAX_LOADED_UPLOADS = 8  # parsed uploads kept in memory
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+MONTHLY_COLUMNS = ['DocDate', 'type', 'parName', 'CATEGORY', 'CatCd', 'weight', 'noPcs']
+EXCLUDED_CATEGORIES = ['ST', 'LOOSE PCS', 'PARA BIDS', 'Langadi', 'PROCESS LOSS',
+                       'SCRAP PCC', 'BALL CHAIN', 'SIGNING TAR', 'Fine']
+EXPORT_COLUMNS = ['DATE', 'PARTY', 'TYPE', 'SIZE', 'DESIGN NO', 'WEIGHT', 'QTY']
+DATE_COLUMNS = ('DocDate', 'DATE')
+COLUMN_DTYPES = {
+    'DocDate': 'datetime', 'type': 'string', 'parName': 'string', 'CATEGORY': 'string', 'CatCd': 'string',
+    'weight': 'float64', 'noPcs': 'float64',
+    'DATE': 'datetime', 'PARTY': 'string', 'TYPE': 'string', 'WEIGHT': 'float64', 'QTY': 'float64',
+}
+
+
+@dataclass
+class ParsedUpload:
+    digest: str
+    data: pd.DataFrame     # the whole file, typed
+    monthly: pd.DataFrame  # rows for the Monthly Sale analysis; None without MONTHLY_COLUMNS
+
+
+def content_digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_upload(content, name, columns=None, progress=None, optional=()):
+    """Parse the raw bytes of an uploaded CSV or Excel file.
+
+    With `columns` only those are read, and all of them must be present
+    (MissingColumnsError otherwise); `optional` columns are read when present.
+    """
+    dtypes = {col: dtype for col, dtype in COLUMN_DTYPES.items() if columns is None or col in columns}
+    name = name.lower()
+    if name.endswith('.csv'):
+        return read_csv_projected(BytesIO(content), columns, dtypes, progress, optional)
+    if name.endswith('.xls'):
+        # legacy workbooks are not readable by openpyxl; parse them whole
+        df = pd.read_excel(BytesIO(content))
+        missing = [col for col in (columns or []) if col not in df.columns]
+        if missing:
+            raise MissingColumnsError(missing)
+        if columns is not None:
+            df = df[list(columns) + [col for col in optional if col in df.columns and col not in columns]]
+        return apply_dtypes(df, dtypes)
+    return read_excel_projected(BytesIO(content), columns, dtypes=dtypes, progress=progress, optional=optional)
+
+
+def streamlit_progress(container):
+    """Progress callback drawing into a Streamlit container, e.g. st.empty()."""
+    def report(done, total):
+        container.progress(min(done / total, 1.0) if total else 0.0, text=f"Reading file... {done:,} rows")
+    return report
+
+
+def prepare_upload(df):
+    """Typed copy of a parsed upload with the date columns converted."""
+    df = compact_frame(df, categorical=())
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def monthly_rows(df):
+    """Monthly Sale rows of a prepared upload, or None if columns are missing."""
+    if not all(col in df.columns for col in MONTHLY_COLUMNS):
+        return None
+    return df[~df['CATEGORY'].isin(EXCLUDED_CATEGORIES)]
+
+
+def _store(data, path):
+    """Write the prepared frame to the cache; failures only cost a reparse later."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError, TypeError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_upload(content, name, columns=None, progress=None, cache_dir=UPLOAD_CACHE_DIR):
+    """ParsedUpload for the file `content` (projected to `columns`), from the on-disk cache when possible."""
+    digest = content_digest(content)
+    projection = "all" if columns is None else hashlib.sha256("\x1f".join(columns).encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"{digest}.{projection}.v{CACHE_VERSION}.parquet")
+    data = None
+    if os.path.exists(path):
+        try:
+            data = pd.read_parquet(path)
+        except (OSError, ValueError):
+            data = None
+    if data is None:
+        data = prepare_upload(read_upload(content, name, columns, progress))
+        _store(data, path)
+    return ParsedUpload(digest, data, monthly_rows(data))
+
+
+def cached_upload(content, name, columns=None, progress=None):
+    """load_upload with the last MAX_LOADED_UPLOADS results kept in memory.
+
+    Used instead of st.cache_resource so `progress` can draw into the page
+    (Streamlit refuses elements created inside a cached function).
+    """
+    key = (content_digest(content), name, None if columns is None else tuple(columns))
+    with _loaded_lock:
+        if key in _loaded:
+            _loaded.move_to_end(key)
+            return _loaded[key]
+    upload = load_upload(content, name, columns, progress)
+    with _loaded_lock:
+        _loaded[key] = upload
+        while len(_loaded) > MAX_LOADED_UPLOADS:
+            _loaded.popitem(last=False)
+    return upload